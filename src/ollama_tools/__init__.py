@@ -3,6 +3,21 @@
 __version__ = "0.1.0"
 
 from .executor import ToolExecutor
-from .schemas import TOOLS, get_tools_array
+from .schemas import get_tools_array, get_tools_array_json, get_tools_array_mutable
 
-__all__ = ["ToolExecutor", "TOOLS", "get_tools_array"]
+__all__ = [
+    "ToolExecutor",
+    "TOOLS",
+    "get_tools_array",
+    "get_tools_array_json",
+    "get_tools_array_mutable",
+]
+
+
+def __getattr__(name: str):
+    # TOOLS is built on first use, see schemas
+    if name == "TOOLS":
+        from . import schemas
+
+        return schemas.TOOLS
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,51 @@
+"""
+Conversion between Anthropic messages and OpenAI chat completions.
+
+Kept free of proxy state and fully annotated so it can be compiled with mypyc
+(see the optional mypyc build hook in pyproject.toml); the plain Python module
+is used when it isn't.
+"""
+
+from typing import Any
+
+
+def anthropic_to_openai(body: dict[str, Any]) -> list[dict[str, Any]]:
+    """Convert an Anthropic /v1/messages request body to OpenAI chat messages."""
+    messages: list[dict[str, Any]] = []
+    system_prompt = body.get("system", "")
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+
+    for msg in body.get("messages", []):
+        role = msg.get("role", "user")
+        content = msg.get("content", "")
+
+        # Handle content blocks: keep text blocks and bare strings, drop the rest
+        if isinstance(content, list):
+            content = "\n".join(
+                block if isinstance(block, str) else block.get("text", "")
+                for block in content
+                if isinstance(block, str)
+                or (isinstance(block, dict) and block.get("type") == "text")
+            )
+
+        messages.append({"role": role, "content": content})
+
+    return messages
+
+
+def openai_to_anthropic(result: dict[str, Any], model: str) -> dict[str, Any]:
+    """Convert an OpenAI chat completion response to an Anthropic message."""
+    choice = result.get("choices", [{}])[0]
+    message = choice.get("message", {})
+    content = message.get("content", "")
+
+    return {
+        "id": result.get("id", "msg_001"),
+        "type": "message",
+        "role": "assistant",
+        "content": [{"type": "text", "text": content}],
+        "model": model,
+        "stop_reason": "end_turn",
+        "usage": result.get("usage", {}),
+    }
@@ -1,17 +1,91 @@
 """Command-line interface for the Ollama Tools Proxy."""
 
 import argparse
+import copy
 import logging
 import os
 import sys
+import tempfile
 
-import uvicorn
+APP_IMPORT_STRING = "ollama_tools.proxy:app"
 
-from .proxy import ProxyConfig, create_app
+logger = logging.getLogger(__name__)
 
+# Startup box, only printed when stdout is a terminal
+_BANNER = """
+╔══════════════════════════════════════════════════════════════╗
+║                   Ollama Tools Proxy                        ║
+╠══════════════════════════════════════════════════════════════╣
+║  Proxy URL:      http://{host}:{port}
+║  Ollama URL:     {ollama_url}
+║  Ollama Auth:    {auth_status}
+║  Ollama API:     {api_mode}
+║  Working Dir:    {working_dir}
+║  Commands:       {commands}
+║  Model:          {model}
+╚══════════════════════════════════════════════════════════════╝
 
-def main():
-    """Run the Ollama Tools Proxy server."""
+Use with Claude Code:
+  ANTHROPIC_AUTH_TOKEN=dummy ANTHROPIC_BASE_URL=http://localhost:{port} claude
+
+Use with OpenAI-compatible clients:
+  POST http://localhost:{port}/v1/chat/completions
+"""
+
+
+def _select_loop() -> str:
+    """Prefer uvloop when installed instead of letting uvicorn guess."""
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        return "auto"
+    return "uvloop"
+
+
+def _write_worker_config(config) -> str:
+    """Write the config to a new file only the current user can read, returning its path."""
+    fd, path = tempfile.mkstemp(prefix="ollama-tools-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        f.write(config.model_dump_json())
+    return path
+
+
+def _worker_log_config(log_level: str) -> dict:
+    """uvicorn logging config that also routes ollama_tools logs in worker processes."""
+    from uvicorn.config import LOGGING_CONFIG
+
+    log_config = copy.deepcopy(LOGGING_CONFIG)
+    log_config["loggers"]["ollama_tools"] = {
+        "handlers": ["default"],
+        "level": log_level,
+        "propagate": False,
+    }
+    return log_config
+
+
+def _select_http() -> str:
+    """Prefer the httptools parser when installed instead of letting uvicorn guess."""
+    try:
+        import httptools  # noqa: F401
+    except ImportError:
+        return "auto"
+    return "httptools"
+
+
+def _env_defaults() -> dict[str, str | None]:
+    """Read all environment-derived defaults in one place."""
+    return {
+        "port": os.environ.get("OLLAMA_TOOLS_PORT", "8080"),
+        "host": os.environ.get("OLLAMA_TOOLS_HOST", "0.0.0.0"),
+        "ollama_url": os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434"),
+        "ollama_auth_token": os.environ.get("OLLAMA_AUTH_TOKEN") or os.environ.get("GRIZFAM_OLLAMA_KEY"),
+        "working_dir": os.getcwd(),
+    }
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser for the proxy CLI."""
+    env = _env_defaults()
     parser = argparse.ArgumentParser(
         description="Ollama Tools Proxy - Adds tool execution to Ollama models",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -35,6 +109,9 @@ Examples:
   # Use Ollama's native Anthropic API (/v1/messages) instead of OpenAI API
   ollama-tools-proxy --ollama-url https://api.grizfam.ai/ollama-direct --use-anthropic-api
 
+  # Run the app under uvicorn directly (the CLI already picks uvloop/httptools)
+  uvicorn ollama_tools.proxy:app --loop uvloop --http httptools --port 8080
+
 Environment variables:
   OLLAMA_BASE_URL     - Ollama server URL (default: http://localhost:11434)
   OLLAMA_AUTH_TOKEN   - Bearer token for Ollama authentication
@@ -46,22 +123,22 @@ Environment variables:
     parser.add_argument(
         "--port", "-p",
         type=int,
-        default=int(os.environ.get("OLLAMA_TOOLS_PORT", "8080")),
+        default=int(env["port"]),
         help="Port to run the proxy server on (default: 8080)"
     )
     parser.add_argument(
         "--host", "-H",
-        default=os.environ.get("OLLAMA_TOOLS_HOST", "0.0.0.0"),
+        default=env["host"],
         help="Host to bind the server to (default: 0.0.0.0)"
     )
     parser.add_argument(
         "--ollama-url",
-        default=os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434"),
+        default=env["ollama_url"],
         help="Ollama server URL (default: http://localhost:11434)"
     )
     parser.add_argument(
         "--ollama-auth-token",
-        default=os.environ.get("OLLAMA_AUTH_TOKEN") or os.environ.get("GRIZFAM_OLLAMA_KEY"),
+        default=env["ollama_auth_token"],
         help="Bearer token for authenticated Ollama endpoints (env: OLLAMA_AUTH_TOKEN or GRIZFAM_OLLAMA_KEY)"
     )
     parser.add_argument(
@@ -71,7 +148,7 @@ Environment variables:
     )
     parser.add_argument(
         "--working-dir", "-w",
-        default=os.getcwd(),
+        default=env["working_dir"],
         help="Working directory for file operations (default: current directory)"
     )
     parser.add_argument(
@@ -99,6 +176,12 @@ Environment variables:
         default=10,
         help="Maximum tool execution iterations per request (default: 10)"
     )
+    parser.add_argument(
+        "--tool-loop-deadline",
+        type=float,
+        default=600.0,
+        help="Maximum seconds a request may spend in the tool loop (default: 600)"
+    )
     parser.add_argument(
         "--default-model",
         default="devstral-small-2:24b",
@@ -109,19 +192,44 @@ Environment variables:
         action="store_true",
         help="Always use default-model, ignoring client-specified models (useful when client sends wrong model names)"
     )
+    parser.add_argument(
+        "--keep-alive",
+        default="30m",
+        help="How long Ollama keeps the model loaded after a request (default: 30m)"
+    )
     parser.add_argument(
         "--log-level",
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
         default="INFO",
         help="Logging level (default: INFO)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes (default: 1)"
+    )
     parser.add_argument(
         "--reload",
         action="store_true",
         help="Enable auto-reload for development"
     )
 
-    args = parser.parse_args()
+    return parser
+
+
+# Built once and reused by main() and any tooling that inspects the CLI
+_PARSER = _build_parser()
+
+
+def main():
+    """Run the Ollama Tools Proxy server."""
+    # Imported lazily so importing the CLI doesn't pull in the ASGI stack
+    import uvicorn
+
+    from .proxy import CONFIG_FILE_ENV_VAR, ProxyConfig, create_app
+
+    args = _PARSER.parse_args()
 
     # Configure logging
     logging.basicConfig(
@@ -138,7 +246,8 @@ Environment variables:
 
     command_allowlist = None
     if args.command_allowlist:
-        command_allowlist = [c.strip() for c in args.command_allowlist.split(",")]
+        # Skip empty entries: an empty prefix would allow every command
+        command_allowlist = [c for c in (c.strip() for c in args.command_allowlist.split(",")) if c]
 
     config = ProxyConfig(
         ollama_base_url=args.ollama_url,
@@ -150,45 +259,66 @@ Environment variables:
         command_allowlist=command_allowlist,
         inject_tools=not args.no_inject_tools,
         max_tool_iterations=args.max_iterations,
+        tool_loop_deadline_seconds=args.tool_loop_deadline,
         default_model=args.default_model,
         force_model=args.force_model,
+        keep_alive=args.keep_alive,
     )
 
     # Print startup info
     auth_status = "Configured" if config.ollama_auth_token else "None"
     api_mode = "Anthropic (/v1/messages)" if config.use_anthropic_api else "OpenAI (/v1/chat/completions)"
     model_mode = f"{config.default_model} (forced)" if config.force_model else config.default_model
-    print(f"""
-╔══════════════════════════════════════════════════════════════╗
-║                   Ollama Tools Proxy                        ║
-╠══════════════════════════════════════════════════════════════╣
-║  Proxy URL:      http://{args.host}:{args.port}
-║  Ollama URL:     {config.ollama_base_url}
-║  Ollama Auth:    {auth_status}
-║  Ollama API:     {api_mode}
-║  Working Dir:    {config.working_directory}
-║  Commands:       {"Enabled" if config.allow_commands else "Disabled"}
-║  Model:          {model_mode}
-╚══════════════════════════════════════════════════════════════╝
-
-Use with Claude Code:
-  ANTHROPIC_AUTH_TOKEN=dummy ANTHROPIC_BASE_URL=http://localhost:{args.port} claude
+    commands = "Enabled" if config.allow_commands else "Disabled"
+    if sys.stdout.isatty():
+        print(_BANNER.format(
+            host=args.host,
+            port=args.port,
+            ollama_url=config.ollama_base_url,
+            auth_status=auth_status,
+            api_mode=api_mode,
+            working_dir=config.working_directory,
+            commands=commands,
+            model=model_mode,
+        ))
+    else:
+        logger.info(
+            "Starting Ollama Tools Proxy on %s:%d (ollama=%s, auth=%s, api=%s, working_dir=%s, commands=%s, model=%s)",
+            args.host, args.port, config.ollama_base_url, auth_status, api_mode,
+            config.working_directory, commands, model_mode,
+        )
 
-Use with OpenAI-compatible clients:
-  POST http://localhost:{args.port}/v1/chat/completions
-""")
-
-    # Create app with config
-    app = create_app(config)
+    # Multiple workers and reload both need an import string; the workers
+    # rebuild the app from a config file named in the environment.
+    run_kwargs = {}
+    config_path = None
+    if args.workers > 1 or args.reload:
+        config_path = _write_worker_config(config)
+        os.environ[CONFIG_FILE_ENV_VAR] = config_path
+        app = APP_IMPORT_STRING
+        run_kwargs["log_config"] = _worker_log_config(args.log_level)
+    else:
+        app = create_app(config)
 
     # Run server
-    uvicorn.run(
-        app,
-        host=args.host,
-        port=args.port,
-        reload=args.reload,
-        log_level=args.log_level.lower()
-    )
+    try:
+        uvicorn.run(
+            app,
+            host=args.host,
+            port=args.port,
+            reload=args.reload,
+            workers=args.workers,
+            log_level=args.log_level.lower(),
+            loop=_select_loop(),
+            http=_select_http(),
+            proxy_headers=True,
+            server_header=False,
+            date_header=False,
+            **run_kwargs,
+        )
+    finally:
+        if config_path:
+            os.unlink(config_path)
 
 
 if __name__ == "__main__":
@@ -1,13 +1,760 @@
 """Tool executor - implements actual file and command operations."""
 
+import array
+import asyncio
+import bisect
 import fnmatch
-import json
+import functools
+import heapq
+import io
+import itertools
+import mmap
 import os
 import re
+import shlex
+import shutil
+import signal
+import stat
 import subprocess
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from pathlib import Path
 from typing import Any
 
+import orjson
+
+from .schemas import get_tool_names
+
+try:
+    import hyperscan
+except ImportError:  # optional: faster literal searches in grep_search
+    hyperscan = None
+
+# Files larger than this are refused rather than read
+MAX_FILE_SIZE = 50_000_000
+
+# Buffer size for read_file, so large files are read in few syscalls
+READ_BUFFER_SIZE = 64 * 1024
+
+# Read-only tool results kept per executor
+READ_CACHE_SIZE = 128
+
+# grep_search stops after this many matching lines
+GREP_MAX_MATCHES = 100
+# Threads used by grep_search to scan files concurrently
+GREP_WORKERS = min(8, os.cpu_count() or 1)
+# ripgrep, used by grep_search when installed; otherwise files are scanned here
+RG_PATH = shutil.which("rg")
+# Seconds a ripgrep search may run before it is killed
+RG_TIMEOUT = 60
+
+# Tools without side effects, which execute_tool_calls() may run concurrently
+READ_ONLY_TOOLS = frozenset({"read_file", "list_directory", "glob_files", "grep_search"})
+
+
+def _scandir_sorted(path: str | Path) -> list[tuple[os.DirEntry, bool]]:
+    """
+    List a directory with directories first, then by name.
+
+    Each entry is paired with its is_dir() result, which DirEntry answers from
+    the directory listing itself rather than a separate stat() call.
+    """
+    with os.scandir(path) as it:
+        entries = [(entry, entry.is_dir()) for entry in it]
+    entries.sort(key=lambda item: (not item[1], item[0].name))
+    return entries
+
+
+def _translate_glob_segment(segment: str) -> str:
+    """Translate one path segment of a glob to a regex that never crosses '/'."""
+    res = []
+    i, n = 0, len(segment)
+    while i < n:
+        c = segment[i]
+        i += 1
+        if c == "*":
+            res.append("[^/]*")
+        elif c == "?":
+            res.append("[^/]")
+        elif c == "[":
+            j = i
+            if j < n and segment[j] == "!":
+                j += 1
+            if j < n and segment[j] == "]":
+                j += 1
+            j = segment.find("]", j)
+            if j < 0:
+                res.append(re.escape(c))
+                continue
+            stuff = segment[i:j].replace("\\", "\\\\")
+            i = j + 1
+            if stuff.startswith("!"):
+                stuff = "^" + stuff[1:]
+            elif stuff.startswith("^"):
+                stuff = "\\" + stuff
+            res.append(f"[{stuff}]")
+        else:
+            res.append(re.escape(c))
+    return "".join(res)
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_glob(pattern: str) -> tuple[re.Pattern, int | None, tuple[re.Pattern, ...]]:
+    """
+    Compile a pathlib-style glob to a regex over '/'-separated relative paths.
+
+    '**' matches any number of directories. Also returns how many directory
+    levels a match can be below the base, or None when '**' makes it unbounded,
+    and a regex per directory segment before the first '**', which a directory
+    at that depth must match to be worth entering.
+    """
+    segments = [seg for seg in pattern.split("/") if seg not in ("", ".")]
+    parts = []
+    dir_segments = []
+    for i, seg in enumerate(segments):
+        if seg == "**":
+            parts.append(".*" if i == len(segments) - 1 else "(?:[^/]+/)*")
+        else:
+            regex = _translate_glob_segment(seg)
+            parts.append(regex + ("/" if i < len(segments) - 1 else ""))
+            if i == len(dir_segments) and i < len(segments) - 1:
+                dir_segments.append(re.compile(regex + r"\Z", re.DOTALL))
+    max_depth = None if "**" in segments else len(segments) - 1
+    return re.compile("".join(parts) + r"\Z", re.DOTALL), max_depth, tuple(dir_segments)
+
+
+def _glob_walk(base: str, pattern: str) -> list[tuple[int, str]]:
+    """
+    Find paths under base matching a glob.
+
+    Returns (mtime in ns, relative path) pairs. The tree is walked once with
+    os.scandir, skipping directories the pattern's leading segments rule out
+    (only src/ is entered for "src/**/*.py"), and each match is stat()ed once
+    for its mtime. Symlinked directories are only entered for the segments
+    before any '**', so a symlink loop can't make '**' recurse forever.
+    """
+    regex, max_depth, dir_segments = _compile_glob(pattern)
+    matches = []
+    stack = [(base, "", 0)]
+    while stack:
+        root, rel_root, depth = stack.pop()
+        try:
+            with os.scandir(root) as it:
+                for entry in it:
+                    rel_path = f"{rel_root}/{entry.name}" if rel_root else entry.name
+                    if regex.match(rel_path):
+                        try:
+                            mtime = entry.stat().st_mtime_ns
+                        except OSError:
+                            mtime = 0
+                        matches.append((mtime, rel_path))
+                    # Like pathlib, follow symlinked directories for the
+                    # pattern's leading segments but not inside '**'
+                    explicit = depth < len(dir_segments)
+                    if (
+                        (max_depth is None or depth < max_depth)
+                        and (not explicit or dir_segments[depth].match(entry.name))
+                        and entry.is_dir(follow_symlinks=explicit)
+                    ):
+                        stack.append((entry.path, rel_path, depth + 1))
+        except OSError:
+            continue
+    return matches
+
+
+_NEWLINE = re.compile(b"\n")
+
+
+def _line_starts(buf: mmap.mmap) -> array.array:
+    """Return the byte offset at which each line of buf starts."""
+    # finditer walks the buffer in C, which beats a find() call per line
+    starts = array.array("q", [0])
+    starts.extend(m.end() for m in _NEWLINE.finditer(buf))
+    return starts
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_fnmatch(pattern: str) -> re.Pattern:
+    """Compile an fnmatch pattern, reusing patterns from earlier listings."""
+    return re.compile(fnmatch.translate(pattern))
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_grep_regex(pattern: str, flags: int) -> re.Pattern:
+    """Compile a grep pattern, reusing patterns from earlier searches."""
+    return re.compile(pattern, flags)
+
+
+def _compile_literal_db(pattern: str, case_insensitive: bool):
+    """
+    Compile a Hyperscan database for a literal grep pattern.
+
+    Returns None when Hyperscan isn't installed or the pattern has regex
+    syntax, in which case grep_search uses the re engine. Hyperscan only folds
+    ASCII case, so case-insensitive non-ASCII literals are left to re too.
+    """
+    if hyperscan is None or not pattern or re.escape(pattern) != pattern:
+        return None
+    if case_insensitive and not pattern.isascii():
+        return None
+    flags = hyperscan.HS_FLAG_CASELESS if case_insensitive else 0
+    return _compile_hyperscan_db((pattern,), (flags,))
+
+
+def _compile_prefilter_db(pattern: str, case_insensitive: bool):
+    """
+    Compile a Hyperscan prefilter for a regex grep pattern.
+
+    In prefilter mode Hyperscan accepts constructs it can't match exactly
+    (backreferences, lookarounds) by matching a superset, so a file it finds
+    nothing in can't contain a match and re never has to scan it. Returns None
+    when Hyperscan isn't installed or can't compile the pattern.
+
+    Hyperscan matches bytes, which only agrees with re's matching of decoded
+    text for ASCII patterns over ASCII text with "\n" line endings. So the
+    pattern must be ASCII, and a second expression matches any non-ASCII byte
+    or "\r", sending those files to re unfiltered. The scan covers the whole
+    file where re searches one line at a time, so patterns anchored to the
+    start or end of the string (\\A, \\Z, \\z) aren't prefiltered either.
+    """
+    # PCRE reads "{,n}" as literal text where Python means "{0,n}"
+    if hyperscan is None or "{," in pattern or not pattern.isascii():
+        return None
+    if any(anchor in pattern for anchor in (r"\A", r"\Z", r"\z")):
+        return None
+    flags = (
+        hyperscan.HS_FLAG_PREFILTER
+        | hyperscan.HS_FLAG_SINGLEMATCH
+        | hyperscan.HS_FLAG_MULTILINE
+        | hyperscan.HS_FLAG_ALLOWEMPTY
+        | (hyperscan.HS_FLAG_CASELESS if case_insensitive else 0)
+    )
+    try:
+        return _compile_hyperscan_db(
+            (pattern, r"[\x80-\xff\r]"), (flags, hyperscan.HS_FLAG_SINGLEMATCH)
+        )
+    except hyperscan.error:
+        return None
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_hyperscan_db(patterns: tuple[str, ...], flags: tuple[int, ...]):
+    """
+    Compile and cache a Hyperscan database matching any of patterns.
+
+    Databases are only ever scanned (each scan brings its own scratch space),
+    so sharing them between searches and threads is safe.
+    """
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[pattern.encode("utf-8") for pattern in patterns],
+        ids=list(range(len(patterns))),
+        flags=list(flags),
+    )
+    return db
+
+
+def _hyperscan_scan(db, buf: mmap.mmap, on_match) -> None:
+    """Scan buf with db; on_match may return True to end the scan early."""
+    try:
+        # Scratch space can't be shared between threads scanning concurrently
+        db.scan(buf, match_event_handler=on_match, scratch=hyperscan.Scratch(db))
+    except hyperscan.ScanTerminated:
+        pass
+
+
+def _hyperscan_line_hits(db, buf: mmap.mmap, size: int, max_lines: int) -> list[int]:
+    """
+    Scan buf with a Hyperscan database and return one match offset per line.
+
+    Hyperscan reports matches by end offset in increasing order; the offset of
+    the match's last byte is kept, which for a literal is on the same line as
+    its start. Scanning stops once max_lines lines have matched.
+    """
+    hits: list[int] = []
+    line_end = -1
+
+    def on_match(_id: int, _start: int, end: int, _flags: int, _ctx: object) -> bool | None:
+        nonlocal line_end
+        offset = end - 1
+        if offset <= line_end:
+            return None
+        hits.append(offset)
+        if len(hits) >= max_lines:
+            return True  # stop scanning
+        line_end = buf.find(b"\n", offset)
+        if line_end < 0:
+            line_end = size
+        return None
+
+    _hyperscan_scan(db, buf, on_match)
+    return hits
+
+
+def _hyperscan_has_match(db, buf: mmap.mmap) -> bool:
+    """Return whether a Hyperscan database matches anywhere in buf."""
+    found = False
+
+    def on_match(_id: int, _start: int, _end: int, _flags: int, _ctx: object) -> bool:
+        nonlocal found
+        found = True
+        return True  # stop scanning
+
+    _hyperscan_scan(db, buf, on_match)
+    return found
+
+
+def _grep_file(
+    file_path: Path,
+    regex: re.Pattern,
+    search_path: Path,
+    context_lines: int,
+    max_matches: int,
+    literal_db=None,
+    prefilter_db=None,
+) -> tuple[bool, list[list[str]]]:
+    """
+    Search one file for regex, or for literal_db when one was compiled.
+
+    regex is searched against each decoded line on its own, split as reading
+    the file in text mode would split it. A literal_db scans the mapped bytes
+    instead, and only the lines it hits are decoded. With a prefilter_db,
+    files it doesn't match are skipped without decoding them.
+
+    Returns whether the file was searched (it is skipped if unreadable, binary
+    or too large) and one block of output lines per matching line.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size > MAX_FILE_SIZE:
+                return False, []
+            if size == 0:
+                return True, []
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Quick binary check on the same mapping
+                if mm.find(b"\x00", 0, 1024) != -1:
+                    return False, []
+
+                try:
+                    rel_path = file_path.relative_to(search_path)
+                except ValueError:
+                    rel_path = file_path
+
+                if prefilter_db is not None and not _hyperscan_has_match(prefilter_db, mm):
+                    return True, []
+
+                if literal_db is not None:
+                    hits = _hyperscan_line_hits(literal_db, mm, size, max_matches)
+                    return True, _grep_hits(mm, size, hits, rel_path, context_lines)
+
+                text = mm[:].decode("utf-8", errors="replace")
+    except Exception:
+        return False, []
+
+    lines = io.StringIO(text, newline=None).readlines()
+    blocks: list[list[str]] = []
+    for i, line in enumerate(lines):
+        if not regex.search(line):
+            continue
+        if context_lines > 0:
+            block = [f"\n{rel_path}:"]
+            for j in range(max(0, i - context_lines), min(len(lines), i + context_lines + 1)):
+                prefix = ">" if j == i else " "
+                block.append(f"{prefix} {j + 1}: {lines[j].rstrip()}")
+        else:
+            block = [f"{rel_path}:{i + 1}: {line.rstrip()}"]
+        blocks.append(block)
+        if len(blocks) >= max_matches:
+            break
+    return True, blocks
+
+
+def _grep_hits(
+    mm: mmap.mmap,
+    size: int,
+    hits: list[int],
+    rel_path: Path,
+    context_lines: int,
+) -> list[list[str]]:
+    """Format literal matches at byte offsets hits, one per line, decoding only the lines shown."""
+    if not hits:
+        return []
+
+    # The line table is only built once the file has a match, so files
+    # without one cost a single scan.
+    line_starts = _line_starts(mm)
+    # A trailing newline doesn't start another line
+    num_lines = len(line_starts) - (line_starts[-1] == size)
+
+    blocks = []
+    for offset in hits:
+        line_no = bisect.bisect_right(line_starts, offset) - 1
+        if context_lines > 0:
+            ctx_start = max(0, line_no - context_lines)
+            ctx_end = min(num_lines, line_no + context_lines + 1)
+            block = [f"\n{rel_path}:"]
+            for j in range(ctx_start, ctx_end):
+                prefix = ">" if j == line_no else " "
+                block.append(f"{prefix} {j + 1}: {_decode_line(mm, line_starts, j)}")
+        else:
+            block = [f"{rel_path}:{line_no + 1}: {_decode_line(mm, line_starts, line_no)}"]
+        blocks.append(block)
+    return blocks
+
+
+# Patterns ripgrep's regex engine reads the same way as re: ordinary
+# characters and operators, \d \w \s \b (and negations), \t \n, escaped
+# punctuation, plain and (?: groups, counted repeats and character classes
+# without nested sets or set operations. Anything else, such as lookarounds,
+# \A/\Z, backreferences or POSIX classes, is searched in Python.
+_RG_COMPATIBLE = re.compile(r"""
+    (?:
+        [^\\\[\](){}]
+      | \\[dDwWsSbBtn]
+      | \\[^\w\s<>]
+      | \((?!\?) | \(\?: | \)
+      | \{\d+(?:,\d*)?\}
+      | \[\^?\]?(?:[^\\\[\]&\-~|] | \\[dDwWsStn] | \\[^\w\s] | ([&\-~|])(?!\1))*\]
+    )*
+""", re.VERBOSE)
+
+# One line of ripgrep output: path, NUL, line number, ":" for a match or "-"
+# for context, then the line
+_RG_LINE = re.compile(rb"(\d+)([:-])")
+# The --stats line counting every file ripgrep searched
+_RG_FILES_SEARCHED = re.compile(rb"(\d+) files searched$")
+
+
+def _rg_search(
+    pattern: str,
+    search_path: Path,
+    file_pattern: str | None,
+    case_insensitive: bool,
+    context_lines: int,
+    max_matches: int,
+) -> tuple[list[str], str] | None:
+    """
+    Run grep_search through ripgrep.
+
+    Produces the same output lines as _grep_file(), with files in path order.
+    ripgrep searches files in parallel and prints each file's lines together,
+    so files are sorted here; --sort would make it search on one thread.
+    Only give it patterns _RG_COMPATIBLE accepts. Returns the output lines and
+    a summary line, or None when ripgrep can't run or rejects the pattern, so
+    the caller can fall back to searching in Python.
+    """
+    cmd = [
+        RG_PATH, "--no-config", "--hidden", "--no-ignore", "--null", "--with-filename",
+        "--line-number", "--no-heading", "--color", "never", "--no-context-separator",
+        "--stats", "--max-count", str(max_matches), "--max-filesize", str(MAX_FILE_SIZE),
+    ]
+    if case_insensitive:
+        cmd.append("-i")
+    if context_lines > 0:
+        cmd += ["-C", str(context_lines)]
+    if file_pattern:
+        cmd += ["--glob", file_pattern]
+    cmd += ["-e", pattern, str(search_path)]
+
+    # Per file: (line number, whether it matched, text) for each line printed
+    files: dict[bytes, list[tuple[int, bool, str]]] = {}
+    files_searched = 0
+
+    try:
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+            timer = threading.Timer(RG_TIMEOUT, proc.kill)
+            timer.start()
+            try:
+                for raw in proc.stdout:
+                    path, sep, rest = raw.partition(b"\0")
+                    if not sep:
+                        m = _RG_FILES_SEARCHED.match(raw.rstrip())
+                        if m:
+                            files_searched = int(m[1])
+                        continue
+                    m = _RG_LINE.match(rest)
+                    if m is None:
+                        continue
+                    text = rest[m.end():].decode("utf-8", errors="replace").rstrip()
+                    files.setdefault(path, []).append((int(m[1]), m[2] == b":", text))
+            finally:
+                timer.cancel()
+    except OSError:
+        return None
+
+    # Exit status 2 is an error, e.g. a pattern ripgrep can't parse
+    if proc.returncode == 2 and not files:
+        return None
+
+    results: list[str] = []
+    matches_found = 0
+    for path in sorted(files, key=lambda p: p.split(b"/")):
+        if matches_found >= max_matches:
+            break
+        rel_path = Path(os.fsdecode(path))
+        try:
+            rel_path = rel_path.relative_to(search_path)
+        except ValueError:
+            pass
+        lines = {line_no: text for line_no, _, text in files[path]}
+        for line_no, matched, text in files[path]:
+            if not matched:
+                continue
+            if context_lines > 0:
+                results.append(f"\n{rel_path}:")
+                for j in range(line_no - context_lines, line_no + context_lines + 1):
+                    if j in lines:
+                        prefix = ">" if j == line_no else " "
+                        results.append(f"{prefix} {j}: {lines[j]}")
+            else:
+                results.append(f"{rel_path}:{line_no}: {text}")
+            matches_found += 1
+            if matches_found >= max_matches:
+                break
+
+    if proc.returncode == -signal.SIGKILL:
+        return results, f"[Found {matches_found} matches before the search timed out after {RG_TIMEOUT} seconds]"
+    return results, f"[Found {matches_found} matches in {files_searched} files searched]"
+
+
+def _grep_tree(
+    regex: re.Pattern,
+    pattern: str,
+    case_insensitive: bool,
+    search_path: Path,
+    file_pattern: str | None,
+    context_lines: int,
+    max_matches: int,
+) -> tuple[list[str], str]:
+    """
+    Run grep_search in Python, scanning files on a thread pool.
+
+    Returns the output lines and a summary line.
+    """
+    literal_db = _compile_literal_db(pattern, case_insensitive)
+    prefilter_db = None if literal_db is not None else _compile_prefilter_db(pattern, case_insensitive)
+
+    results = []
+    files_searched = 0
+    matches_found = 0
+
+    # Collect files to search
+    if search_path.is_file():
+        files_to_search = [search_path]
+    else:
+        if file_pattern:
+            files_to_search = list(search_path.glob(f"**/{file_pattern}"))
+        else:
+            files_to_search = [f for f in search_path.rglob("*") if f.is_file()]
+
+    files_to_search = files_to_search[:1000]
+    stop = threading.Event()
+    lock = threading.Lock()
+    total_found = 0
+
+    def search_file(file_path: Path) -> tuple[bool, list[list[str]]] | None:
+        nonlocal total_found
+        # Files are started in order, so once 100 matches exist among the
+        # started ones nothing later can make it into the output.
+        if stop.is_set():
+            return None
+        outcome = _grep_file(
+            file_path, regex, search_path, context_lines, max_matches,
+            literal_db, prefilter_db
+        )
+        if outcome[1]:
+            with lock:
+                total_found += len(outcome[1])
+                if total_found >= max_matches:
+                    stop.set()
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=min(GREP_WORKERS, len(files_to_search) or 1)) as pool:
+        # map() yields in file order, so the output matches a sequential scan
+        for outcome in pool.map(search_file, files_to_search):
+            if outcome is None:
+                continue
+            searched, blocks = outcome
+            files_searched += searched
+            for block in blocks[:max_matches - matches_found]:
+                results.extend(block)
+                matches_found += 1
+            if matches_found >= max_matches:
+                stop.set()
+                break
+
+    return results, f"[Found {matches_found} matches in {files_searched} files searched]"
+
+
+def _decode_line(buf: mmap.mmap, line_starts: array.array, index: int) -> str:
+    """Decode one line of a mapped file, given the table of line start offsets."""
+    start = line_starts[index]
+    end = line_starts[index + 1] if index + 1 < len(line_starts) else len(buf)
+    return buf[start:end].decode("utf-8", errors="replace").rstrip()
+
+
+# Characters that need a shell: pipes, redirection, lists, substitution, globs
+_SHELL_SYNTAX = re.compile(r"[|&;<>()$`*?\[\]{}~#!\n]")
+
+
+# Shell builtins, which behave differently (or not at all) as executables;
+# echo in dash expands backslash escapes where /bin/echo doesn't
+_SHELL_BUILTINS = frozenset({
+    ".", "alias", "cd", "command", "echo", "eval", "exec", "exit", "export", "getopts",
+    "hash", "kill", "printf", "pwd", "read", "readonly", "set", "shift", "source", "test",
+    "times", "trap", "type", "ulimit", "umask", "unalias", "unset", "wait",
+})
+
+
+def _split_simple_command(command: str) -> list[str] | None:
+    """
+    Split a command that needs no shell into its arguments.
+
+    Returns None for commands using shell syntax, environment assignments or
+    shell builtins, which run_command hands to /bin/sh as before. Running the
+    rest directly saves starting a shell per command.
+    """
+    if _SHELL_SYNTAX.search(command):
+        return None
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        return None
+    if not args or "=" in args[0] or args[0] in _SHELL_BUILTINS:
+        return None
+    return args
+
+
+def _find_executable(name: str, cwd: str | Path) -> str | None:
+    """
+    Find the program the shell would run for name.
+
+    Returns None when there is none, or when it is neither a binary nor a #!
+    script; the shell runs files without a #! line itself.
+    """
+    if os.sep in name:
+        path = os.path.join(cwd, name)
+        if not (os.path.isfile(path) and os.access(path, os.X_OK)):
+            return None
+    else:
+        path = shutil.which(name)
+        if path is None:
+            return None
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(4)
+    except OSError:
+        return None
+    return path if magic.startswith(b"#!") or magic == b"\x7fELF" else None
+
+
+def _is_subpath(path: str, parent: str) -> bool:
+    """Check if path is equal to or a subpath of parent (both already resolved)."""
+    if path == parent:
+        return True
+    prefix = parent if parent.endswith(os.sep) else parent + os.sep
+    return path.startswith(prefix)
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """
+    Replace the contents of path with data.
+
+    The data goes to a temporary file in the same directory which is then
+    renamed over the target, so readers never see a partially written file.
+    An existing file's permission bits are carried over.
+    """
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None
+
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        try:
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            if mode is not None:
+                os.fchmod(fd, mode)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _stat_stamp(path: Path) -> tuple[int, int, int, int]:
+    """Identify a version of path's contents; atomic replaces change the inode."""
+    st = path.stat()
+    return (st.st_mtime_ns, st.st_size, st.st_ino, st.st_mode)
+
+
+def _cached_read(path_arg: str, default: str = ".", skip_if: str | None = None, files_only: bool = False):
+    """
+    Cache a read-only tool's results until its target path changes.
+
+    Entries are keyed on the tool, the resolved target path and the arguments,
+    and are only reused while the target's stat stamp is unchanged.
+    Only use this where that stamp covers the whole result: a directory's mtime
+    tracks its direct entries but not edits to files further down the tree.
+
+    Args:
+        path_arg: Name of the argument holding the target path
+        default: Target path when the argument is omitted
+        skip_if: Name of a boolean argument that disables caching when true
+        files_only: Only cache when the target is a regular file
+    """
+    def decorator(method):
+        tool_name = method.__name__.removeprefix("_tool_")
+
+        @functools.wraps(method)
+        def wrapper(self: "ToolExecutor", **kwargs: Any) -> str:
+            if skip_if and kwargs.get(skip_if):
+                return method(self, **kwargs)
+            try:
+                path = self._resolve_path(kwargs.get(path_arg) or default)
+                stamp = _stat_stamp(path)
+            except OSError:
+                # Missing or denied: let the tool produce its own error
+                return method(self, **kwargs)
+            if files_only and not stat.S_ISREG(stamp[3]):
+                return method(self, **kwargs)
+
+            key = (tool_name, str(path), frozenset(kwargs.items()))
+            try:
+                hash(key)
+            except TypeError:
+                # An unhashable argument, such as a list: run uncached
+                return method(self, **kwargs)
+
+            with self._read_cache_lock:
+                cached = self._read_cache.get(key)
+                if cached is not None and cached[0] == stamp:
+                    self._read_cache.move_to_end(key)
+                    return cached[1]
+
+            result = method(self, **kwargs)
+
+            with self._read_cache_lock:
+                self._read_cache[key] = (stamp, result)
+                self._read_cache.move_to_end(key)
+                while len(self._read_cache) > READ_CACHE_SIZE:
+                    self._read_cache.popitem(last=False)
+            return result
+
+        return wrapper
+
+    return decorator
+
 
 class ToolExecutor:
     """Executes tool calls and returns results."""
@@ -34,28 +781,48 @@ class ToolExecutor:
         ]
         self.allow_commands = allow_commands
         self.command_allowlist = command_allowlist
+        self._allow: frozenset[str] = frozenset(command_allowlist or ())
+        # One anchored alternation checks every prefix in a single match
+        self._allow_re = re.compile(
+            r"\s*(?:" + "|".join(re.escape(prefix) for prefix in sorted(self._allow)) + ")"
+        ) if self._allow else None
+
+        # Results of read-only tools, see _cached_read()
+        self._read_cache: OrderedDict[
+            tuple[str, str, frozenset[tuple[str, Any]]], tuple[tuple[int, ...], str]
+        ] = OrderedDict()
+        self._read_cache_lock = threading.Lock()
+        # Directories write_file has created or found, so later writes into
+        # them skip the makedirs() syscalls
+        self._known_dirs: set[str] = set()
+
+        # Handlers for the tools with a schema, so arbitrary _tool_ attributes
+        # can't be called and dispatch is a single lookup
+        self._dispatch: dict[str, Callable[..., str]] = {
+            name: getattr(self, f"_tool_{name}") for name in get_tool_names()
+        }
+
+    def clear_cache(self) -> None:
+        """Drop cached tool results and known directories."""
+        self._clear_read_cache()
+        self._known_dirs.clear()
+
+    def _clear_read_cache(self) -> None:
+        """Drop cached tool results, after a write changed file contents."""
+        with self._read_cache_lock:
+            self._read_cache.clear()
 
     def _resolve_path(self, file_path: str) -> Path:
         """Resolve a path relative to working directory and validate access."""
-        path = Path(file_path)
-        if not path.is_absolute():
-            path = self.working_directory / path
-        path = path.resolve()
+        # Resolved on every call: a command may have retargeted a symlink
+        path = os.path.realpath(os.path.join(self.working_directory, file_path))
 
         # Security check: ensure path is within allowed directories
-        if not any(self._is_subpath(path, allowed) for allowed in self.allowed_directories):
+        if not any(_is_subpath(path, str(parent)) for parent in self.allowed_directories):
             raise PermissionError(
                 f"Access denied: {path} is outside allowed directories"
             )
-        return path
-
-    def _is_subpath(self, path: Path, parent: Path) -> bool:
-        """Check if path is equal to or a subpath of parent."""
-        try:
-            path.relative_to(parent)
-            return True
-        except ValueError:
-            return False
+        return Path(path)
 
     def execute(self, tool_name: str, arguments: dict[str, Any]) -> str:
         """
@@ -68,17 +835,43 @@ class ToolExecutor:
         Returns:
             String result to return to the LLM
         """
+        handler = self._dispatch.get(tool_name)
+        if handler is None:
+            return f"Error: Unknown tool '{tool_name}'"
         try:
-            method = getattr(self, f"_tool_{tool_name}", None)
-            if method is None:
-                return f"Error: Unknown tool '{tool_name}'"
-            return method(**arguments)
-        except PermissionError as e:
-            return f"Permission denied: {e}"
-        except FileNotFoundError as e:
-            return f"File not found: {e}"
+            return handler(**arguments)
         except Exception as e:
-            return f"Error executing {tool_name}: {type(e).__name__}: {e}"
+            return self._error_result(tool_name, e)
+
+    async def execute_async(self, tool_name: str, arguments: dict[str, Any]) -> str:
+        """
+        Execute a tool call without blocking the event loop.
+
+        run_command runs as an asyncio subprocess; the file tools do blocking
+        I/O and are run in a worker thread.
+
+        Args:
+            tool_name: Name of the tool to execute
+            arguments: Dictionary of arguments for the tool
+
+        Returns:
+            String result to return to the LLM
+        """
+        if tool_name != "run_command":
+            return await asyncio.to_thread(self.execute, tool_name, arguments)
+        try:
+            return await self._tool_run_command_async(**arguments)
+        except Exception as e:
+            return self._error_result(tool_name, e)
+
+    @staticmethod
+    def _error_result(tool_name: str, error: Exception) -> str:
+        """Format an exception raised by a tool as a result for the LLM."""
+        if isinstance(error, PermissionError):
+            return f"Permission denied: {error}"
+        if isinstance(error, FileNotFoundError):
+            return f"File not found: {error}"
+        return f"Error executing {tool_name}: {type(error).__name__}: {error}"
 
     def execute_tool_call(self, tool_call: dict[str, Any]) -> dict[str, Any]:
         """
@@ -90,17 +883,72 @@ class ToolExecutor:
         Returns:
             Tool result message in API format
         """
+        tool_name, arguments = self._parse_tool_call(tool_call)
+        result = self.execute(tool_name, arguments)
+        return self._tool_result_message(tool_call, result)
+
+    async def execute_tool_call_async(self, tool_call: dict[str, Any]) -> dict[str, Any]:
+        """Async variant of execute_tool_call() built on execute_async()."""
+        tool_name, arguments = self._parse_tool_call(tool_call)
+        result = await self.execute_async(tool_name, arguments)
+        return self._tool_result_message(tool_call, result)
+
+    async def execute_tool_calls(
+        self,
+        tool_calls: list[dict[str, Any]],
+        concurrency: int = 8
+    ) -> list[dict[str, Any]]:
+        """
+        Execute the tool calls from one assistant message.
+
+        Consecutive read-only calls run concurrently, at most `concurrency` at
+        a time. Calls that modify files or run commands run one at a time, so
+        each call still sees the effects of the calls before it.
+
+        Args:
+            tool_calls: Tool call objects from the API response
+            concurrency: Maximum number of read-only calls in flight
+
+        Returns:
+            Tool result messages in the same order as tool_calls
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run_read(tool_call: dict[str, Any]) -> dict[str, Any]:
+            async with semaphore:
+                return await self.execute_tool_call_async(tool_call)
+
+        results: list[dict[str, Any]] = []
+        reads: list[dict[str, Any]] = []
+        for tool_call in tool_calls:
+            if tool_call.get("function", {}).get("name") in READ_ONLY_TOOLS:
+                reads.append(tool_call)
+                continue
+            if reads:
+                results.extend(await asyncio.gather(*map(run_read, reads)))
+                reads = []
+            results.append(await self.execute_tool_call_async(tool_call))
+        if reads:
+            results.extend(await asyncio.gather(*map(run_read, reads)))
+        return results
+
+    @staticmethod
+    def _parse_tool_call(tool_call: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """Extract the tool name and decoded arguments from an API tool call."""
         function = tool_call.get("function", {})
         tool_name = function.get("name", "")
         arguments_str = function.get("arguments", "{}")
 
         try:
-            arguments = json.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
-        except json.JSONDecodeError:
+            arguments = orjson.loads(arguments_str) if isinstance(arguments_str, str) else arguments_str
+        except orjson.JSONDecodeError:
             arguments = {}
 
-        result = self.execute(tool_name, arguments)
+        return tool_name, arguments
 
+    @staticmethod
+    def _tool_result_message(tool_call: dict[str, Any], result: str) -> dict[str, Any]:
+        """Wrap a tool result as an API tool message."""
         return {
             "role": "tool",
             "tool_call_id": tool_call.get("id", ""),
@@ -109,6 +957,7 @@ class ToolExecutor:
 
     # ========== Tool Implementations ==========
 
+    @_cached_read("file_path")
     def _tool_read_file(
         self,
         file_path: str,
@@ -124,11 +973,9 @@ class ToolExecutor:
         if not path.is_file():
             return f"Error: Path is not a file: {file_path}"
 
-        try:
-            with open(path, "r", encoding="utf-8", errors="replace") as f:
-                lines = f.readlines()
-        except Exception as e:
-            return f"Error reading file: {e}"
+        size = path.stat().st_size
+        if size > MAX_FILE_SIZE:
+            return f"Error: File is too large to read ({size} bytes, limit {MAX_FILE_SIZE}): {file_path}"
 
         # Apply offset (1-indexed)
         start_line = (offset or 1) - 1
@@ -139,7 +986,14 @@ class ToolExecutor:
         max_lines = limit or 2000
         end_line = start_line + max_lines
 
-        selected_lines = lines[start_line:end_line]
+        # Only the requested window is materialized; one extra readline tells
+        # us whether the file continues past it.
+        try:
+            with open(path, "r", buffering=READ_BUFFER_SIZE, encoding="utf-8", errors="replace") as f:
+                selected_lines = list(itertools.islice(f, start_line, end_line))
+                has_more = f.readline() != ""
+        except Exception as e:
+            return f"Error reading file: {e}"
 
         # Format with line numbers
         output_lines = []
@@ -155,24 +1009,34 @@ class ToolExecutor:
         result = "\n".join(output_lines)
 
         # Add info about truncation
-        if end_line < len(lines):
-            result += f"\n\n[Showing lines {start_line + 1}-{end_line} of {len(lines)} total]"
+        if has_more:
+            result += f"\n\n[Showing lines {start_line + 1}-{end_line}, more lines follow]"
 
         return result
 
-    def _tool_write_file(self, file_path: str, content: str) -> str:
+    def _tool_write_file(self, file_path: str, content: str | bytes) -> str:
         """Write content to a file."""
         path = self._resolve_path(file_path)
 
         # Create parent directories if needed
-        path.parent.mkdir(parents=True, exist_ok=True)
+        parent = os.path.dirname(path)
+        if parent not in self._known_dirs:
+            os.makedirs(parent, exist_ok=True)
+            self._known_dirs.add(parent)
 
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(content)
-            return f"Successfully wrote {len(content)} bytes to {file_path}"
+            data = content if isinstance(content, bytes) else content.encode("utf-8")
+            try:
+                _atomic_write(path, data)
+            except FileNotFoundError:
+                # The directory was removed after we saw it
+                os.makedirs(parent, exist_ok=True)
+                _atomic_write(path, data)
+            return f"Successfully wrote {len(data)} bytes to {file_path}"
         except Exception as e:
             return f"Error writing file: {e}"
+        finally:
+            self._clear_read_cache()
 
     def _tool_edit_file(
         self,
@@ -184,38 +1048,43 @@ class ToolExecutor:
         """Edit file by string replacement."""
         path = self._resolve_path(file_path)
 
-        if not path.exists():
-            return f"Error: File does not exist: {file_path}"
+        if not old_string:
+            return "Error: old_string must not be empty"
 
         try:
             with open(path, "r", encoding="utf-8") as f:
                 content = f.read()
+        except FileNotFoundError:
+            return f"Error: File does not exist: {file_path}"
         except Exception as e:
             return f"Error reading file: {e}"
 
-        # Check if old_string exists
-        count = content.count(old_string)
-        if count == 0:
-            return f"Error: old_string not found in file. Make sure it matches exactly including whitespace."
-
-        if count > 1 and not replace_all:
-            return f"Error: old_string found {count} times in file. Set replace_all=true to replace all, or provide more context to make it unique."
-
-        # Perform replacement
+        # partition() stops at the first occurrence; the membership test on the
+        # rest finishes the uniqueness check, so the file is scanned once.
         if replace_all:
-            new_content = content.replace(old_string, new_string)
-            replaced_count = count
+            parts = content.split(old_string)
+            replaced_count = len(parts) - 1
+            new_content = new_string.join(parts)
         else:
-            new_content = content.replace(old_string, new_string, 1)
-            replaced_count = 1
+            head, found, rest = content.partition(old_string)
+            if found and old_string in rest:
+                count = 1 + rest.count(old_string)
+                return f"Error: old_string found {count} times in file. Set replace_all=true to replace all, or provide more context to make it unique."
+            replaced_count = 1 if found else 0
+            new_content = head + new_string + rest
+
+        if not replaced_count:
+            return f"Error: old_string not found in file. Make sure it matches exactly including whitespace."
 
         try:
-            with open(path, "w", encoding="utf-8") as f:
-                f.write(new_content)
+            _atomic_write(path, new_content.encode("utf-8"))
             return f"Successfully replaced {replaced_count} occurrence(s) in {file_path}"
         except Exception as e:
             return f"Error writing file: {e}"
+        finally:
+            self._clear_read_cache()
 
+    @_cached_read("path", skip_if="recursive")
     def _tool_list_directory(
         self,
         path: str,
@@ -225,42 +1094,50 @@ class ToolExecutor:
         """List directory contents."""
         dir_path = self._resolve_path(path)
 
-        if not dir_path.exists():
+        # One stat answers both checks
+        try:
+            mode = os.stat(dir_path).st_mode
+        except (FileNotFoundError, NotADirectoryError):
             return f"Error: Directory does not exist: {path}"
-
-        if not dir_path.is_dir():
+        if not stat.S_ISDIR(mode):
             return f"Error: Path is not a directory: {path}"
 
         results = []
+        add_result = results.append
+        # Compile the glob once instead of letting fnmatch translate it per entry
+        matches = _compile_fnmatch(pattern).match if pattern else None
 
         if recursive:
-            for root, dirs, files in os.walk(dir_path):
-                # Limit depth to 3 levels
-                depth = len(Path(root).relative_to(dir_path).parts)
-                if depth > 3:
-                    dirs.clear()
+            # Depth-first walk; subdirectories at depth 3 are listed but not entered
+            stack = [(str(dir_path), "", 0)]
+            while stack:
+                root, rel_root, depth = stack.pop()
+                try:
+                    entries = _scandir_sorted(root)
+                except OSError:
                     continue
 
-                rel_root = Path(root).relative_to(dir_path)
-
-                for d in sorted(dirs):
-                    rel_path = rel_root / d if str(rel_root) != "." else Path(d)
-                    if pattern is None or fnmatch.fnmatch(str(rel_path), pattern):
-                        results.append(f"[DIR]  {rel_path}/")
+                subdirs = []
+                for entry, is_dir in entries:
+                    rel_path = f"{rel_root}/{entry.name}" if rel_root else entry.name
+                    if matches is None or matches(rel_path) is not None:
+                        if is_dir:
+                            add_result(f"[DIR]  {rel_path}/")
+                        else:
+                            add_result(f"[FILE] {rel_path}")
+                    if depth < 3 and entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, rel_path, depth + 1))
 
-                for f in sorted(files):
-                    rel_path = rel_root / f if str(rel_root) != "." else Path(f)
-                    if pattern is None or fnmatch.fnmatch(str(rel_path), pattern):
-                        results.append(f"[FILE] {rel_path}")
+                # Reversed so subdirectories are visited in sorted order
+                stack.extend(reversed(subdirs))
         else:
-            entries = sorted(dir_path.iterdir(), key=lambda p: (not p.is_dir(), p.name))
-            for entry in entries:
-                if pattern and not fnmatch.fnmatch(entry.name, pattern):
+            for entry, is_dir in _scandir_sorted(dir_path):
+                if matches is not None and matches(entry.name) is None:
                     continue
-                if entry.is_dir():
-                    results.append(f"[DIR]  {entry.name}/")
+                if is_dir:
+                    add_result(f"[DIR]  {entry.name}/")
                 else:
-                    results.append(f"[FILE] {entry.name}")
+                    add_result(f"[FILE] {entry.name}")
 
         if not results:
             return f"Directory is empty or no files match pattern: {path}"
@@ -274,29 +1151,20 @@ class ToolExecutor:
         if not base_path.is_dir():
             return f"Error: Path is not a directory: {path}"
 
-        matches = list(base_path.glob(pattern))
-
-        # Sort by modification time (most recent first)
-        matches.sort(key=lambda p: p.stat().st_mtime if p.exists() else 0, reverse=True)
+        matches = _glob_walk(str(base_path), pattern)
 
         if not matches:
             return f"No files found matching pattern: {pattern}"
 
-        # Format results with relative paths
-        results = []
-        for match in matches[:200]:  # Limit results
-            try:
-                rel_path = match.relative_to(base_path)
-                results.append(str(rel_path))
-            except ValueError:
-                results.append(str(match))
-
-        output = "\n".join(results)
+        # Most recently modified first; only the shown entries are ordered
+        newest = heapq.nlargest(200, matches, key=itemgetter(0))
+        output = "\n".join(rel_path for _, rel_path in newest)
         if len(matches) > 200:
             output += f"\n\n[Showing 200 of {len(matches)} matches]"
 
         return output
 
+    @_cached_read("path", files_only=True)
     def _tool_grep_search(
         self,
         pattern: str,
@@ -310,80 +1178,55 @@ class ToolExecutor:
 
         flags = re.IGNORECASE if case_insensitive else 0
         try:
-            regex = re.compile(pattern, flags)
+            regex = _compile_grep_regex(pattern, flags)
         except re.error as e:
             return f"Invalid regex pattern: {e}"
 
-        results = []
-        files_searched = 0
-        matches_found = 0
-
-        # Collect files to search
-        if search_path.is_file():
-            files_to_search = [search_path]
-        else:
-            if file_pattern:
-                files_to_search = list(search_path.glob(f"**/{file_pattern}"))
-            else:
-                files_to_search = [f for f in search_path.rglob("*") if f.is_file()]
-
-        # Filter out binary files and limit
-        text_files = []
-        for f in files_to_search[:1000]:
-            try:
-                # Quick binary check
-                with open(f, "rb") as fp:
-                    chunk = fp.read(1024)
-                    if b"\x00" in chunk:
-                        continue
-                text_files.append(f)
-            except Exception:
-                continue
-
-        for file_path in text_files:
-            try:
-                with open(file_path, "r", encoding="utf-8", errors="replace") as f:
-                    lines = f.readlines()
-
-                files_searched += 1
+        found = None
+        if RG_PATH is not None and _RG_COMPATIBLE.fullmatch(pattern):
+            found = _rg_search(
+                pattern, search_path, file_pattern, case_insensitive, context_lines, GREP_MAX_MATCHES
+            )
+        if found is None:
+            found = _grep_tree(
+                regex, pattern, case_insensitive, search_path, file_pattern, context_lines,
+                GREP_MAX_MATCHES
+            )
+        results, summary = found
 
-                for i, line in enumerate(lines):
-                    if regex.search(line):
-                        matches_found += 1
+        if not results:
+            return f"No matches found for pattern: {pattern}"
 
-                        # Get context
-                        start = max(0, i - context_lines)
-                        end = min(len(lines), i + context_lines + 1)
+        return "\n".join(results) + "\n\n" + summary
 
-                        try:
-                            rel_path = file_path.relative_to(search_path)
-                        except ValueError:
-                            rel_path = file_path
-
-                        if context_lines > 0:
-                            results.append(f"\n{rel_path}:")
-                            for j in range(start, end):
-                                prefix = ">" if j == i else " "
-                                results.append(f"{prefix} {j + 1}: {lines[j].rstrip()}")
-                        else:
-                            results.append(f"{rel_path}:{i + 1}: {line.rstrip()}")
+    def _check_command(self, command: str) -> str | None:
+        """Return an error message if the command may not be run, else None."""
+        if not self.allow_commands:
+            return "Error: Command execution is disabled"
 
-                        if matches_found >= 100:
-                            break
+        # Check command allowlist
+        if self._allow_re is not None and not self._allow_re.match(command):
+            return f"Error: Command not in allowlist. Allowed prefixes: {self.command_allowlist}"
 
-            except Exception:
-                continue
+        return None
 
-            if matches_found >= 100:
-                break
+    @staticmethod
+    def _format_command_result(stdout: str, stderr: str, returncode: int) -> str:
+        """Format a finished command's output for the LLM."""
+        output_parts = []
+        if stdout:
+            output_parts.append(f"STDOUT:\n{stdout}")
+        if stderr:
+            output_parts.append(f"STDERR:\n{stderr}")
 
-        if not results:
-            return f"No matches found for pattern: {pattern}"
+        output = "\n\n".join(output_parts) if output_parts else "(no output)"
 
-        output = "\n".join(results)
-        output += f"\n\n[Found {matches_found} matches in {files_searched} files searched]"
+        # Truncate if too long
+        if len(output) > 30000:
+            output = output[:30000] + "\n\n[Output truncated at 30000 characters]"
 
-        return output
+        status = "Success" if returncode == 0 else f"Failed (exit code {returncode})"
+        return f"{status}\n\n{output}"
 
     def _tool_run_command(
         self,
@@ -392,43 +1235,93 @@ class ToolExecutor:
         timeout: int = 120
     ) -> str:
         """Execute a shell command."""
-        if not self.allow_commands:
-            return "Error: Command execution is disabled"
-
-        # Check command allowlist
-        if self.command_allowlist:
-            allowed = any(command.strip().startswith(prefix) for prefix in self.command_allowlist)
-            if not allowed:
-                return f"Error: Command not in allowlist. Allowed prefixes: {self.command_allowlist}"
+        error = self._check_command(command)
+        if error:
+            return error
 
         cwd = self._resolve_path(working_directory) if working_directory else self.working_directory
 
+        args = _split_simple_command(command)
+        run_kwargs = {
+            "cwd": cwd,
+            "capture_output": True,
+            "text": True,
+            "timeout": min(timeout, 600),  # Cap at 10 minutes
+        }
+
+        # Commands the shell would report as not found still go through it,
+        # so the error reads the same; nothing is ever started twice.
+        executable = _find_executable(args[0], cwd) if args is not None else None
+
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                cwd=cwd,
-                capture_output=True,
-                text=True,
-                timeout=min(timeout, 600)  # Cap at 10 minutes
-            )
+            if executable is not None:
+                result = subprocess.run(args, executable=executable, **run_kwargs)
+            else:
+                result = subprocess.run(command, shell=True, **run_kwargs)
+            return self._format_command_result(result.stdout, result.stderr, result.returncode)
+
+        except subprocess.TimeoutExpired:
+            return f"Error: Command timed out after {timeout} seconds"
+        except Exception as e:
+            return f"Error executing command: {e}"
+        finally:
+            # The command may have changed files or retargeted symlinks
+            self.clear_cache()
 
-            output_parts = []
-            if result.stdout:
-                output_parts.append(f"STDOUT:\n{result.stdout}")
-            if result.stderr:
-                output_parts.append(f"STDERR:\n{result.stderr}")
+    async def _tool_run_command_async(
+        self,
+        command: str,
+        working_directory: str | None = None,
+        timeout: int = 120
+    ) -> str:
+        """Execute a shell command as an asyncio subprocess."""
+        error = self._check_command(command)
+        if error:
+            return error
 
-            output = "\n\n".join(output_parts) if output_parts else "(no output)"
+        cwd = self._resolve_path(working_directory) if working_directory else self.working_directory
 
-            # Truncate if too long
-            if len(output) > 30000:
-                output = output[:30000] + "\n\n[Output truncated at 30000 characters]"
+        args = _split_simple_command(command)
+        spawn_kwargs = {
+            "cwd": cwd,
+            "stdout": asyncio.subprocess.PIPE,
+            "stderr": asyncio.subprocess.PIPE,
+            "start_new_session": True,
+        }
 
-            status = "Success" if result.returncode == 0 else f"Failed (exit code {result.returncode})"
-            return f"{status}\n\n{output}"
+        executable = _find_executable(args[0], cwd) if args is not None else None
 
-        except subprocess.TimeoutExpired:
-            return f"Error: Command timed out after {timeout} seconds"
+        try:
+            if executable is not None:
+                proc = await asyncio.create_subprocess_exec(
+                    *args, executable=executable, **spawn_kwargs
+                )
+            else:
+                proc = await asyncio.create_subprocess_shell(command, **spawn_kwargs)
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    proc.communicate(),
+                    timeout=min(timeout, 600)  # Cap at 10 minutes
+                )
+            except TimeoutError:
+                return f"Error: Command timed out after {timeout} seconds"
+            finally:
+                # Don't leave the shell or its children behind on timeout or
+                # cancellation; they would also hold the output pipes open.
+                if proc.returncode is None:
+                    try:
+                        os.killpg(proc.pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                    await proc.wait()
+
+            return self._format_command_result(
+                stdout.decode("utf-8", errors="replace"),
+                stderr.decode("utf-8", errors="replace"),
+                proc.returncode,
+            )
         except Exception as e:
             return f"Error executing command: {e}"
+        finally:
+            # The command may have changed files or retargeted symlinks
+            self.clear_cache()
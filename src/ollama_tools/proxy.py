@@ -8,20 +8,38 @@ This server sits between clients and Ollama, automatically:
 """
 
 import asyncio
-import json
+import functools
+import hashlib
 import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from typing import Any, AsyncIterator
 
 import httpx
+import orjson
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
+from ._conv import anthropic_to_openai, openai_to_anthropic
 from .executor import ToolExecutor
-from .schemas import TOOLS
+from .schemas import TOOLS, get_tools_array_json
 
 logger = logging.getLogger(__name__)
 
+# Environment variable naming the file that hands the CLI's config to uvicorn
+# worker processes. The config itself, auth token included, stays out of the
+# environment that run_command children inherit.
+CONFIG_FILE_ENV_VAR = "OLLAMA_TOOLS_CONFIG_FILE"
+
+# Server-sent event framing, kept as bytes so streamed chunks are never re-encoded
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+_SSE_DONE = b"data: [DONE]\n\n"
+
 
 class ProxyConfig(BaseModel):
     """Configuration for the proxy server."""
@@ -35,8 +53,97 @@ class ProxyConfig(BaseModel):
     command_allowlist: list[str] | None = None
     inject_tools: bool = True
     max_tool_iterations: int = 10
+    # Wall-clock cap on a whole tool loop. One generation may take up to the
+    # 300s read timeout on slow local models, so this leaves room for a few.
+    tool_loop_deadline_seconds: float = 600.0
     default_model: str = "devstral-small-2:24b"
     force_model: bool = False  # Always use default_model, ignore client-specified models
+    keep_alive: str | None = "30m"  # How long Ollama keeps the model loaded; None for Ollama's default
+    response_cache_size: int = 512  # Cached responses to temperature 0 requests; 0 disables
+    response_cache_ttl: float = 300.0  # Seconds a cached response stays valid
+
+    @classmethod
+    def from_env(cls) -> "ProxyConfig":
+        """
+        Build a config from environment variables.
+
+        Worker processes re-import this module, so the CLI writes its config to
+        a private file named by OLLAMA_TOOLS_CONFIG_FILE. Without it,
+        OLLAMA_BASE_URL and OLLAMA_AUTH_TOKEN are applied on top of the defaults.
+        """
+        path = os.environ.get(CONFIG_FILE_ENV_VAR)
+        if path:
+            with open(path, "rb") as f:
+                return cls.model_validate_json(f.read())
+
+        overrides: dict[str, Any] = {}
+        if os.environ.get("OLLAMA_BASE_URL"):
+            overrides["ollama_base_url"] = os.environ["OLLAMA_BASE_URL"]
+        if os.environ.get("OLLAMA_AUTH_TOKEN"):
+            overrides["ollama_auth_token"] = os.environ["OLLAMA_AUTH_TOKEN"]
+        return cls(**overrides)
+
+
+def _merge_tool_call_deltas(
+    tool_calls: dict[int, dict[str, Any]],
+    deltas: list[dict[str, Any]]
+) -> None:
+    """Fold streamed tool call fragments into complete tool calls, keyed by index."""
+    for delta in deltas:
+        if "index" in delta:
+            index = delta["index"]
+        elif delta.get("id") or not tool_calls:
+            index = len(tool_calls)
+        else:
+            index = max(tool_calls)
+
+        call = tool_calls.setdefault(index, {
+            "id": "",
+            "type": "function",
+            "function": {"name": "", "arguments": ""}
+        })
+        if delta.get("id"):
+            call["id"] = delta["id"]
+
+        function = delta.get("function") or {}
+        if function.get("name"):
+            call["function"]["name"] += function["name"]
+        arguments = function.get("arguments")
+        if isinstance(arguments, str):
+            call["function"]["arguments"] += arguments
+        elif arguments is not None:
+            call["function"]["arguments"] = arguments
+
+
+def _approx_tokens(messages: list[dict[str, Any]]) -> int:
+    """Estimate the token count of messages at ~4 characters of text per token."""
+    total = 0
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            total += len(content)
+        elif isinstance(content, list):
+            for block in content:
+                if not isinstance(block, dict):
+                    continue
+                text = block.get("text", block.get("content"))
+                if isinstance(text, str):
+                    total += len(text)
+    return total // 4
+
+
+def _status_error(response: httpx.Response) -> httpx.HTTPStatusError:
+    """Build the error raised for a non-2xx Ollama response."""
+    return httpx.HTTPStatusError(
+        f"Ollama returned {response.status_code} {response.reason_phrase} for {response.url}",
+        request=response.request,
+        response=response,
+    )
+
+
+def _json_response(data: Any) -> Response:
+    """Serialize a response body with orjson rather than FastAPI's encoder."""
+    return Response(content=orjson.dumps(data), media_type="application/json")
 
 
 class OllamaToolProxy:
@@ -55,13 +162,53 @@ class OllamaToolProxy:
         self.ollama_headers: dict[str, str] = {}
         if self.config.ollama_auth_token:
             self.ollama_headers["Authorization"] = f"Bearer {self.config.ollama_auth_token}"
-
-        self.client = httpx.AsyncClient(timeout=300.0)
+        self._json_headers = {**self.ollama_headers, "Content-Type": "application/json"}
+
+        # The built-in tool schemas never change; splice in their cached JSON
+        self._default_tools_json = orjson.Fragment(get_tools_array_json())
+
+        # In-flight _call_ollama requests, keyed by a hash of the request body
+        self._inflight: dict[bytes, asyncio.Task[bytes]] = {}
+        # Callers still waiting on each in-flight request
+        self._waiters: dict[asyncio.Task[bytes], int] = {}
+        # Raw responses to deterministic requests, same keys: (expiry time, body)
+        self._response_cache: OrderedDict[bytes, tuple[float, bytes]] = OrderedDict()
+
+        # One pooled client for every Ollama call. HTTP/2 is negotiated over TLS
+        # (plain http:// stays on HTTP/1.1); idle connections are kept long
+        # enough to survive the gaps between tool loop iterations.
+        self.client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=256,
+                max_keepalive_connections=64,
+                keepalive_expiry=120.0,
+            ),
+            timeout=httpx.Timeout(connect=10.0, read=300.0, write=30.0, pool=10.0),
+        )
 
     async def close(self):
         """Close the HTTP client."""
         await self.client.aclose()
 
+    async def warm_up(self, connections: int = 2) -> None:
+        """
+        Open connections to Ollama ahead of the first request.
+
+        Issues a few concurrent GET /v1/models so the pool already holds
+        established connections. Failures are logged and ignored; Ollama may
+        simply not be up yet.
+        """
+        url = f"{self.config.ollama_base_url}/v1/models"
+        results = await asyncio.gather(
+            *(self.client.get(url, headers=self.ollama_headers, timeout=2.0) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning("Could not pre-connect to Ollama at %s: %s", self.config.ollama_base_url, result)
+                break
+
     async def chat_completion(
         self,
         messages: list[dict[str, Any]],
@@ -69,6 +216,7 @@ class OllamaToolProxy:
         tools: list[dict[str, Any]] | None = None,
         tool_choice: str | None = "auto",
         stream: bool = False,
+        in_place: bool = False,
         **kwargs
     ) -> dict[str, Any]:
         """
@@ -80,22 +228,84 @@ class OllamaToolProxy:
             tools: Tool definitions (defaults to built-in tools if inject_tools is True)
             tool_choice: How to handle tool selection
             stream: Whether to stream the response
+            in_place: Append tool messages to `messages` itself instead of a copy
             **kwargs: Additional parameters to pass to Ollama
 
         Returns:
             OpenAI-compatible chat completion response
         """
+        request_body = self._build_request_body(messages, model, tools, tool_choice, kwargs)
+
+        # Execute with tool loop. current_messages is append-only: earlier
+        # entries are never reordered or modified, so every iteration's prompt
+        # starts with the previous one and Ollama can reuse its cached prefix.
+        current_messages = messages if in_place else list(messages)
+        iterations = 0
+        response: dict[str, Any] | None = None
+        deadline = self.config.tool_loop_deadline_seconds
+
+        try:
+            async with asyncio.timeout(deadline):
+                while iterations < self.config.max_tool_iterations:
+                    iterations += 1
+
+                    # Call Ollama
+                    response = await self._call_ollama(request_body, current_messages)
+
+                    # Check for tool calls
+                    choice = response.get("choices", [{}])[0]
+                    message = choice.get("message", {})
+                    tool_calls = message.get("tool_calls", [])
+
+                    if not tool_calls:
+                        # No tool calls, return final response
+                        return response
+
+                    # Execute tool calls
+                    logger.info("Executing %d tool call(s)", len(tool_calls))
+
+                    # Add assistant message with tool calls
+                    current_messages.append(message)
+
+                    # Execute the tools (read-only ones concurrently) and add results in order
+                    current_messages.extend(await self.executor.execute_tool_calls(tool_calls))
+                    for tool_call in tool_calls:
+                        func_name = tool_call.get("function", {}).get("name", "unknown")
+                        logger.info("Executed tool: %s", func_name)
+
+                    # Update request with new messages
+                    request_body["messages"] = current_messages
+        except TimeoutError:
+            logger.warning("Tool loop deadline (%ss) reached after %d iteration(s)", deadline, iterations)
+            if response is None:
+                raise TimeoutError(f"No response from Ollama within {deadline}s") from None
+            if response.get("choices"):
+                response["choices"][0]["finish_reason"] = "max_time"
+            return response
+
+        # Max iterations reached
+        logger.warning("Max tool iterations (%d) reached", self.config.max_tool_iterations)
+        return response
+
+    def _build_request_body(
+        self,
+        messages: list[dict[str, Any]],
+        model: str | None,
+        tools: list[dict[str, Any]] | None,
+        tool_choice: str | None,
+        kwargs: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Build the OpenAI-compatible request body sent to Ollama."""
         model = model or self.config.default_model
 
         # Inject tools if enabled and not provided
         if self.config.inject_tools and tools is None:
             tools = TOOLS
 
-        # Build request for Ollama
         request_body = {
             "model": model,
             "messages": messages,
-            "stream": False,  # We handle streaming separately
+            "stream": False,  # Set per call by _call_ollama / _stream_ollama
             **kwargs
         }
 
@@ -104,71 +314,142 @@ class OllamaToolProxy:
         if tool_choice:
             request_body["tool_choice"] = tool_choice
 
-        # Execute with tool loop
-        current_messages = list(messages)
-        iterations = 0
-
-        while iterations < self.config.max_tool_iterations:
-            iterations += 1
+        # Keep the model (and its prompt cache) loaded between tool iterations
+        if self.config.keep_alive is not None:
+            request_body.setdefault("keep_alive", self.config.keep_alive)
 
-            # Call Ollama
-            response = await self._call_ollama(request_body, current_messages)
-
-            # Check for tool calls
-            choice = response.get("choices", [{}])[0]
-            message = choice.get("message", {})
-            tool_calls = message.get("tool_calls", [])
-
-            if not tool_calls:
-                # No tool calls, return final response
-                return response
-
-            # Execute tool calls
-            logger.info(f"Executing {len(tool_calls)} tool call(s)")
-
-            # Add assistant message with tool calls
-            current_messages.append(message)
+        return request_body
 
-            # Execute each tool and add results
-            for tool_call in tool_calls:
-                tool_result = self.executor.execute_tool_call(tool_call)
-                current_messages.append(tool_result)
-
-                func_name = tool_call.get("function", {}).get("name", "unknown")
-                logger.info(f"Executed tool: {func_name}")
-
-            # Update request with new messages
-            request_body["messages"] = current_messages
-
-        # Max iterations reached
-        logger.warning(f"Max tool iterations ({self.config.max_tool_iterations}) reached")
-        return response
+    def _encode_request_body(self, request_body: dict[str, Any]) -> bytes:
+        """Serialize an Ollama request body, splicing in the pre-serialized default tools."""
+        if request_body.get("tools") is TOOLS:
+            request_body = {**request_body, "tools": self._default_tools_json}
+        return orjson.dumps(request_body)
 
     async def _call_ollama(
         self,
         request_body: dict[str, Any],
         messages: list[dict[str, Any]]
     ) -> dict[str, Any]:
-        """Make a request to Ollama using OpenAI-compatible API."""
+        """
+        Make a request to Ollama using OpenAI-compatible API.
+
+        Identical requests that are in flight at the same time share one
+        upstream call. The call runs in its own task, so it isn't cancelled
+        when one of the waiting clients goes away, only when the last one
+        does. Each caller parses its own copy of the response.
+
+        Requests with temperature 0 are deterministic, so their responses are
+        also cached for config.response_cache_ttl seconds. Tool results are
+        part of the messages, so a changed result is a different request.
+        """
         request_body["messages"] = messages
 
         url = f"{self.config.ollama_base_url}/v1/chat/completions"
+        content = self._encode_request_body(request_body)
+        key = hashlib.blake2b(content, digest_size=16).digest()
+
+        cacheable = self.config.response_cache_size > 0 and request_body.get("temperature") == 0
+        if cacheable:
+            cached = self._get_cached_response(key)
+            if cached is not None:
+                return orjson.loads(cached)
 
         try:
-            response = await self.client.post(
-                url,
-                json=request_body,
-                headers=self.ollama_headers
-            )
-            response.raise_for_status()
-            return response.json()
+            task = self._inflight.get(key)
+            if task is None:
+                task = asyncio.create_task(self._post_ollama(url, content))
+                self._inflight[key] = task
+                task.add_done_callback(functools.partial(self._inflight_done, key))
+            self._waiters[task] = self._waiters.get(task, 0) + 1
+            try:
+                body = await asyncio.shield(task)
+            finally:
+                self._release_waiter(key, task)
+            if cacheable:
+                self._cache_response(key, body)
+            return orjson.loads(body)
         except httpx.HTTPStatusError as e:
-            logger.error(f"Ollama request failed: {e.response.status_code} - {e.response.text}")
+            logger.error("Ollama request failed: %d - %s", e.response.status_code, e.response.text)
             raise
         except Exception as e:
-            logger.error(f"Ollama request error: {e}")
+            logger.error("Ollama request error: %s", e)
             raise
 
+    async def _post_ollama(self, url: str, content: bytes) -> bytes:
+        """POST an encoded request body to Ollama and return the raw response body."""
+        response = await self.client.post(url, content=content, headers=self._json_headers)
+        if response.status_code >= 300:
+            raise _status_error(response)
+        return response.content
+
+    def _get_cached_response(self, key: bytes) -> bytes | None:
+        """Return a cached response body if it hasn't expired."""
+        entry = self._response_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, body = entry
+        if expires_at <= time.monotonic():
+            del self._response_cache[key]
+            return None
+        self._response_cache.move_to_end(key)
+        return body
+
+    def _cache_response(self, key: bytes, body: bytes) -> None:
+        """Cache a response body, evicting the least recently used entries."""
+        self._response_cache[key] = (time.monotonic() + self.config.response_cache_ttl, body)
+        self._response_cache.move_to_end(key)
+        while len(self._response_cache) > self.config.response_cache_size:
+            self._response_cache.popitem(last=False)
+
+    def _release_waiter(self, key: bytes, task: asyncio.Task) -> None:
+        """Drop a caller of a shared request, cancelling it when nobody is left waiting."""
+        self._waiters[task] -= 1
+        if self._waiters[task]:
+            return
+        del self._waiters[task]
+        if not task.done():
+            # Every caller was cancelled; don't keep Ollama generating for nobody
+            task.cancel()
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+
+    def _inflight_done(self, key: bytes, task: asyncio.Task) -> None:
+        """Forget a finished shared request."""
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every waiter was cancelled
+
+    async def _stream_ollama(
+        self,
+        request_body: dict[str, Any],
+        messages: list[dict[str, Any]]
+    ) -> AsyncIterator[bytes]:
+        """Stream a request to Ollama using OpenAI-compatible API, yielding raw SSE lines."""
+        request_body = {**request_body, "messages": messages, "stream": True}
+
+        url = f"{self.config.ollama_base_url}/v1/chat/completions"
+
+        async with self.client.stream(
+            "POST",
+            url,
+            content=self._encode_request_body(request_body),
+            headers=self._json_headers
+        ) as response:
+            if response.status_code >= 300:
+                await response.aread()
+                logger.error("Ollama streaming request failed: %d - %s", response.status_code, response.text)
+                raise _status_error(response)
+            # Split lines as bytes; the events are forwarded without decoding
+            pending = b""
+            async for chunk in response.aiter_bytes():
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    yield line
+            if pending:
+                yield pending
+
     async def _call_ollama_anthropic(
         self,
         request_body: dict[str, Any]
@@ -183,10 +464,11 @@ class OllamaToolProxy:
         if self.config.force_model:
             client_model = request_body.get("model", "")
             if client_model != self.config.default_model:
-                logger.info(f"Forcing model: {client_model} -> {self.config.default_model}")
+                logger.info("Forcing model: %s -> %s", client_model, self.config.default_model)
                 request_body["model"] = self.config.default_model
 
-        logger.debug(f"Anthropic API request to {url}: {request_body}")
+        # Formatting the whole request body is expensive, so only do it when it is logged
+        logger.debug("Anthropic API request to %s: %s", url, request_body)
 
         try:
             response = await self.client.post(
@@ -194,22 +476,25 @@ class OllamaToolProxy:
                 json=request_body,
                 headers=self.ollama_headers
             )
-            response.raise_for_status()
+            if response.status_code >= 300:
+                raise _status_error(response)
 
-            # Log raw response for debugging
-            raw_text = response.text
-            logger.debug(f"Anthropic API raw response: {raw_text[:500] if raw_text else '(empty)'}")
+            # Parse the raw bytes directly; decoding to text is only needed for debug logs
+            content = response.content
+            if logger.isEnabledFor(logging.DEBUG):
+                preview = content[:500].decode("utf-8", errors="replace") if content else "(empty)"
+                logger.debug("Anthropic API raw response: %s", preview)
 
-            if not raw_text:
+            if not content:
                 logger.error("Ollama returned empty response body")
                 raise ValueError("Empty response from Ollama")
 
-            return response.json()
+            return orjson.loads(content)
         except httpx.HTTPStatusError as e:
-            logger.error(f"Ollama Anthropic API request failed: {e.response.status_code} - {e.response.text}")
+            logger.error("Ollama Anthropic API request failed: %d - %s", e.response.status_code, e.response.text)
             raise
         except Exception as e:
-            logger.error(f"Ollama Anthropic API request error: {e}")
+            logger.error("Ollama Anthropic API request error: %s", e)
             raise
 
     async def _stream_ollama_anthropic(
@@ -226,26 +511,29 @@ class OllamaToolProxy:
         if self.config.force_model:
             client_model = request_body.get("model", "")
             if client_model != self.config.default_model:
-                logger.info(f"Forcing model: {client_model} -> {self.config.default_model}")
+                logger.info("Forcing model: %s -> %s", client_model, self.config.default_model)
                 request_body["model"] = self.config.default_model
 
-        # Log request content
-        logger.debug(f"Anthropic API streaming request to {url}")
-        messages = request_body.get("messages", [])
-        logger.info(f"REQUEST: {len(messages)} messages")
-        for i, msg in enumerate(messages[-3:]):  # Log last 3 messages
-            role = msg.get("role", "?")
-            content = msg.get("content", "")
-            if isinstance(content, list):
-                content_summary = f"[{len(content)} blocks]"
-            else:
-                content_summary = content[:200] + "..." if len(str(content)) > 200 else content
-            logger.info(f"  msg[{i}] {role}: {content_summary}")
+        # Log request content. The summaries below slice and format message
+        # content, so skip all of it when INFO is disabled.
+        logger.debug("Anthropic API streaming request to %s", url)
+        log_info = logger.isEnabledFor(logging.INFO)
+        if log_info:
+            messages = request_body.get("messages", [])
+            logger.info("REQUEST: %d messages", len(messages))
+            for i, msg in enumerate(messages[-3:]):  # Log last 3 messages
+                role = msg.get("role", "?")
+                content = msg.get("content", "")
+                if isinstance(content, list):
+                    content_summary = f"[{len(content)} blocks]"
+                else:
+                    content_summary = content[:200] + "..." if len(str(content)) > 200 else content
+                logger.info("  msg[%d] %s: %s", i, role, content_summary)
 
-        tools = request_body.get("tools", [])
-        if tools:
-            tool_names = [t.get("name", "?") for t in tools]
-            logger.info(f"  tools: {tool_names[:10]}{'...' if len(tool_names) > 10 else ''}")
+            tools = request_body.get("tools", [])
+            if tools:
+                tool_names = [t.get("name", "?") for t in tools]
+                logger.info("  tools: %s%s", tool_names[:10], "..." if len(tool_names) > 10 else "")
 
         async with self.client.stream(
             "POST",
@@ -253,84 +541,120 @@ class OllamaToolProxy:
             json=request_body,
             headers=self.ollama_headers
         ) as response:
-            response.raise_for_status()
-            response_text = ""
+            if response.status_code >= 300:
+                await response.aread()
+                raise _status_error(response)
+            # Only keep a copy of the response when it will be summarized
+            response_bytes = bytearray() if log_info else None
             async for chunk in response.aiter_bytes():
-                # Accumulate for logging
-                try:
-                    response_text += chunk.decode("utf-8", errors="ignore")
-                except:
-                    pass
+                if response_bytes is not None:
+                    response_bytes += chunk
                 yield chunk
 
-            # Log response summary
-            if "tool_use" in response_text:
-                logger.info(f"RESPONSE: Contains tool_use")
-                # Try to extract tool names
-                import re
-                tool_matches = re.findall(r'"name"\s*:\s*"([^"]+)"', response_text)
-                if tool_matches:
-                    logger.info(f"  tools called: {tool_matches}")
-            else:
-                # Log first part of text response
-                text_preview = response_text[:500].replace('\n', ' ')
-                logger.info(f"RESPONSE: {text_preview}...")
+        if response_bytes is None:
+            return
+
+        # Log response summary
+        response_text = response_bytes.decode("utf-8", errors="ignore")
+        if "tool_use" in response_text:
+            logger.info("RESPONSE: Contains tool_use")
+            # Try to extract tool names
+            tool_matches = re.findall(r'"name"\s*:\s*"([^"]+)"', response_text)
+            if tool_matches:
+                logger.info("  tools called: %s", tool_matches)
+        else:
+            # Log first part of text response
+            logger.info("RESPONSE: %s...", response_text[:500].replace("\n", " "))
 
     async def chat_completion_stream(
         self,
         messages: list[dict[str, Any]],
         model: str | None = None,
         tools: list[dict[str, Any]] | None = None,
+        tool_choice: str | None = "auto",
+        in_place: bool = False,
         **kwargs
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[bytes]:
         """
         Stream a chat completion response.
 
-        Note: Tool calls are executed before streaming begins.
-        The final response after tool execution is streamed.
+        Every round trip to Ollama is streamed. Content chunks are forwarded to
+        the client as they arrive; tool call chunks are collected, the tools are
+        executed once the round trip ends, and the conversation continues with
+        their results.
         """
-        # First, execute with tools (non-streaming)
-        result = await self.chat_completion(
-            messages=messages,
-            model=model,
-            tools=tools,
-            stream=False,
-            **kwargs
-        )
+        request_body = self._build_request_body(messages, model, tools, tool_choice, kwargs)
+        # Append-only, see chat_completion()
+        current_messages = messages if in_place else list(messages)
+
+        for _ in range(self.config.max_tool_iterations):
+            content_parts: list[str] = []
+            tool_calls: dict[int, dict[str, Any]] = {}
+
+            async for line in self._stream_ollama(request_body, current_messages):
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    continue
+
+                chunk = orjson.loads(data)
+                choice = (chunk.get("choices") or [{}])[0]
+                delta = choice.get("delta") or {}
+                if delta.get("content"):
+                    content_parts.append(delta["content"])
+
+                # Tool calls are handled here, not by the client
+                if delta.get("tool_calls"):
+                    _merge_tool_call_deltas(tool_calls, delta["tool_calls"])
+                    continue
+                if choice.get("finish_reason") == "tool_calls":
+                    continue
+
+                yield _SSE_PREFIX + data + _SSE_SUFFIX
 
-        # Stream the final response
-        content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+            if not tool_calls:
+                break
 
-        # Yield as SSE events
-        for i in range(0, len(content), 50):
-            chunk = content[i:i+50]
-            data = {
-                "choices": [{
-                    "delta": {"content": chunk},
-                    "index": 0
-                }]
-            }
-            yield f"data: {json.dumps(data)}\n\n"
-            await asyncio.sleep(0.01)
+            calls = [tool_calls[index] for index in sorted(tool_calls)]
+            logger.info("Executing %d tool call(s)", len(calls))
 
-        yield "data: [DONE]\n\n"
+            # Add assistant message with tool calls
+            current_messages.append({
+                "role": "assistant",
+                "content": "".join(content_parts),
+                "tool_calls": calls
+            })
+
+            # Execute the tools (read-only ones concurrently) and add results in order
+            current_messages.extend(await self.executor.execute_tool_calls(calls))
+            for tool_call in calls:
+                func_name = tool_call.get("function", {}).get("name", "unknown")
+                logger.info("Executed tool: %s", func_name)
+        else:
+            logger.warning("Max tool iterations (%d) reached", self.config.max_tool_iterations)
+
+        yield _SSE_DONE
 
 
 def create_app(config: ProxyConfig | None = None) -> FastAPI:
     """Create the FastAPI application."""
 
+    proxy = OllamaToolProxy(config)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await proxy.warm_up()
+        yield
+        await proxy.close()
+
     app = FastAPI(
         title="Ollama Tools Proxy",
         description="Proxy server that adds tool execution capabilities to Ollama models",
-        version="0.1.0"
+        version="0.1.0",
+        lifespan=lifespan
     )
 
-    proxy = OllamaToolProxy(config)
-
-    @app.on_event("shutdown")
-    async def shutdown():
-        await proxy.close()
-
     @app.get("/health")
     async def health():
         return {"status": "healthy"}
@@ -345,11 +669,8 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
     async def count_tokens(request: Request):
         """Stub for token counting - return estimate based on message length."""
         try:
-            body = await request.json()
-            # Rough estimate: ~4 chars per token
-            text = str(body.get("messages", []))
-            estimated_tokens = len(text) // 4
-            return {"input_tokens": estimated_tokens}
+            body = orjson.loads(await request.body())
+            return {"input_tokens": _approx_tokens(body.get("messages", []))}
         except Exception:
             return {"input_tokens": 0}
 
@@ -361,7 +682,7 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
                 f"{proxy.config.ollama_base_url}/v1/models",
                 headers=proxy.ollama_headers
             )
-            return response.json()
+            return _json_response(orjson.loads(response.content))
         except Exception as e:
             raise HTTPException(status_code=502, detail=str(e))
 
@@ -369,19 +690,17 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
     async def chat_completions(request: Request):
         """Handle chat completion requests with tool execution."""
         try:
-            body = await request.json()
+            body = orjson.loads(await request.body())
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid JSON body")
 
-        messages = body.get("messages", [])
-        model = body.get("model")
-        tools = body.get("tools")
-        tool_choice = body.get("tool_choice", "auto")
-        stream = body.get("stream", False)
-
-        # Remove fields we handle specially
-        kwargs = {k: v for k, v in body.items()
-                  if k not in ["messages", "model", "tools", "tool_choice", "stream"]}
+        # Take out the fields we handle specially; the rest is passed through
+        messages = body.pop("messages", [])
+        model = body.pop("model", None)
+        tools = body.pop("tools", None)
+        tool_choice = body.pop("tool_choice", "auto")
+        stream = body.pop("stream", False)
+        kwargs = body
 
         try:
             if stream:
@@ -390,6 +709,8 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
                         messages=messages,
                         model=model,
                         tools=tools,
+                        tool_choice=tool_choice,
+                        in_place=True,
                         **kwargs
                     ),
                     media_type="text/event-stream"
@@ -401,11 +722,14 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
                     tools=tools,
                     tool_choice=tool_choice,
                     stream=False,
+                    in_place=True,
                     **kwargs
                 )
-                return result
+                return _json_response(result)
         except httpx.HTTPStatusError as e:
             raise HTTPException(status_code=e.response.status_code, detail=e.response.text)
+        except TimeoutError as e:
+            raise HTTPException(status_code=504, detail=str(e))
         except Exception as e:
             logger.exception("Error processing request")
             raise HTTPException(status_code=500, detail=str(e))
@@ -419,7 +743,7 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
         Otherwise, converts to OpenAI format, processes, and converts back.
         """
         try:
-            body = await request.json()
+            body = orjson.loads(await request.body())
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid JSON body")
 
@@ -441,7 +765,7 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
                     )
                 else:
                     result = await proxy._call_ollama_anthropic(body)
-                    return result
+                    return _json_response(result)
             except httpx.HTTPStatusError as e:
                 raise HTTPException(status_code=e.response.status_code, detail=e.response.text)
             except Exception as e:
@@ -449,26 +773,7 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
                 raise HTTPException(status_code=500, detail=str(e))
 
         # Otherwise, convert to OpenAI format and process
-        messages = []
-        system_prompt = body.get("system", "")
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        for msg in body.get("messages", []):
-            role = msg.get("role", "user")
-            content = msg.get("content", "")
-
-            # Handle content blocks
-            if isinstance(content, list):
-                text_parts = []
-                for block in content:
-                    if isinstance(block, dict) and block.get("type") == "text":
-                        text_parts.append(block.get("text", ""))
-                    elif isinstance(block, str):
-                        text_parts.append(block)
-                content = "\n".join(text_parts)
-
-            messages.append({"role": role, "content": content})
+        messages = anthropic_to_openai(body)
 
         model = body.get("model", proxy.config.default_model)
 
@@ -476,23 +781,12 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
             result = await proxy.chat_completion(
                 messages=messages,
                 model=model,
-                stream=False
+                stream=False,
+                in_place=True
             )
 
             # Convert back to Anthropic format
-            choice = result.get("choices", [{}])[0]
-            message = choice.get("message", {})
-            content = message.get("content", "")
-
-            return {
-                "id": result.get("id", "msg_001"),
-                "type": "message",
-                "role": "assistant",
-                "content": [{"type": "text", "text": content}],
-                "model": model,
-                "stop_reason": "end_turn",
-                "usage": result.get("usage", {})
-            }
+            return _json_response(openai_to_anthropic(result, model))
         except Exception as e:
             logger.exception("Error processing Anthropic-style request")
             raise HTTPException(status_code=500, detail=str(e))
@@ -500,5 +794,5 @@ def create_app(config: ProxyConfig | None = None) -> FastAPI:
     return app
 
 
-# Default app instance for uvicorn
-app = create_app()
+# Default app instance for uvicorn (also the import target for worker processes)
+app = create_app(ProxyConfig.from_env())
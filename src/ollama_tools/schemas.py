@@ -1,195 +1,187 @@
 """OpenAI-compatible tool schema definitions."""
 
+import copy
+import threading
+from dataclasses import dataclass
 from typing import Any
 
-TOOLS: list[dict[str, Any]] = [
-    {
-        "type": "function",
-        "function": {
-            "name": "read_file",
-            "description": "Read the contents of a file at the specified path. Returns the file contents as a string with line numbers. Use this to examine existing code before making changes.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "The absolute or relative path to the file to read"
-                    },
-                    "offset": {
-                        "type": "integer",
-                        "description": "Optional line number to start reading from (1-indexed). If not specified, reads from the beginning."
-                    },
-                    "limit": {
-                        "type": "integer",
-                        "description": "Optional maximum number of lines to read. If not specified, reads up to 2000 lines."
-                    }
-                },
-                "required": ["file_path"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "write_file",
-            "description": "Write content to a file at the specified path. This will create the file if it doesn't exist or completely overwrite it if it does. Use read_file first to check existing content before overwriting.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "The path to the file to write"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "The complete content to write to the file"
-                    }
-                },
-                "required": ["file_path", "content"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "edit_file",
-            "description": "Edit a file by replacing a specific string with new content. The old_string must match exactly (including whitespace and indentation). Use read_file first to see the exact content to replace.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "file_path": {
-                        "type": "string",
-                        "description": "The path to the file to edit"
-                    },
-                    "old_string": {
-                        "type": "string",
-                        "description": "The exact string to find and replace. Must be unique within the file unless replace_all is true."
-                    },
-                    "new_string": {
-                        "type": "string",
-                        "description": "The string to replace old_string with. Can be empty to delete the old_string."
-                    },
-                    "replace_all": {
-                        "type": "boolean",
-                        "description": "If true, replace all occurrences. If false (default), fail if old_string is not unique."
-                    }
-                },
-                "required": ["file_path", "old_string", "new_string"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "list_directory",
-            "description": "List the contents of a directory. Returns file and directory names with type indicators.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "path": {
-                        "type": "string",
-                        "description": "The directory path to list. Use '.' for current directory."
-                    },
-                    "recursive": {
-                        "type": "boolean",
-                        "description": "If true, list contents recursively up to 3 levels deep. Default is false."
-                    },
-                    "pattern": {
-                        "type": "string",
-                        "description": "Optional glob pattern to filter results (e.g., '*.py')"
-                    }
-                },
-                "required": ["path"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "glob_files",
-            "description": "Find files matching a glob pattern. Returns a list of matching file paths sorted by modification time.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "pattern": {
-                        "type": "string",
-                        "description": "Glob pattern to match files (e.g., '**/*.py' for all Python files, 'src/**/*.tsx' for TSX files in src)"
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "Optional base directory to search from. Defaults to current directory."
-                    }
-                },
-                "required": ["pattern"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "grep_search",
-            "description": "Search for a text pattern within files using regex. Returns matching lines with file paths and line numbers.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "pattern": {
-                        "type": "string",
-                        "description": "Regular expression pattern to search for"
-                    },
-                    "path": {
-                        "type": "string",
-                        "description": "File or directory to search in. Defaults to current directory."
-                    },
-                    "file_pattern": {
-                        "type": "string",
-                        "description": "Glob pattern to filter which files to search (e.g., '*.py')"
-                    },
-                    "case_insensitive": {
-                        "type": "boolean",
-                        "description": "If true, perform case-insensitive matching. Default is false."
-                    },
-                    "context_lines": {
-                        "type": "integer",
-                        "description": "Number of lines to show before and after each match. Default is 0."
-                    }
-                },
-                "required": ["pattern"]
-            }
-        }
-    },
-    {
-        "type": "function",
-        "function": {
-            "name": "run_command",
-            "description": "Execute a shell command and return its output. Use for running tests, builds, git commands, and other CLI operations.",
-            "parameters": {
-                "type": "object",
-                "properties": {
-                    "command": {
-                        "type": "string",
-                        "description": "The shell command to execute"
-                    },
-                    "working_directory": {
-                        "type": "string",
-                        "description": "Directory to run the command in. Defaults to current directory."
-                    },
-                    "timeout": {
-                        "type": "integer",
-                        "description": "Timeout in seconds. Default is 120 seconds."
-                    }
+import orjson
+
+
+@dataclass(frozen=True, slots=True)
+class ToolParam:
+    """One parameter of a tool."""
+
+    name: str
+    type: str
+    description: str
+    required: bool = False
+
+    def as_api_dict(self) -> dict[str, str]:
+        """Return the parameter's JSON schema."""
+        return {"type": self.type, "description": self.description}
+
+
+@dataclass(frozen=True, slots=True)
+class ToolSchema:
+    """A tool the model can call, with its parameters in declaration order."""
+
+    name: str
+    description: str
+    params: tuple[ToolParam, ...]
+
+    def as_api_dict(self) -> dict[str, Any]:
+        """Return the tool in the OpenAI function-calling format (a new dict each call)."""
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": {
+                    "type": "object",
+                    "properties": {param.name: param.as_api_dict() for param in self.params},
+                    "required": [param.name for param in self.params if param.required],
                 },
-                "required": ["command"]
-            }
+            },
         }
-    }
-]
 
 
-def get_tools_array() -> list[dict[str, Any]]:
-    """Return the tools array for use in API calls."""
-    return TOOLS.copy()
+def _typed_tools() -> tuple[ToolSchema, ...]:
+    return (
+        ToolSchema(
+            name="read_file",
+            description="Read the contents of a file at the specified path. Returns the file contents as a string with line numbers. Use this to examine existing code before making changes.",
+            params=(
+                ToolParam("file_path", "string", "The absolute or relative path to the file to read", required=True),
+                ToolParam("offset", "integer", "Optional line number to start reading from (1-indexed). If not specified, reads from the beginning."),
+                ToolParam("limit", "integer", "Optional maximum number of lines to read. If not specified, reads up to 2000 lines."),
+            ),
+        ),
+        ToolSchema(
+            name="write_file",
+            description="Write content to a file at the specified path. This will create the file if it doesn't exist or completely overwrite it if it does. Use read_file first to check existing content before overwriting.",
+            params=(
+                ToolParam("file_path", "string", "The path to the file to write", required=True),
+                ToolParam("content", "string", "The complete content to write to the file", required=True),
+            ),
+        ),
+        ToolSchema(
+            name="edit_file",
+            description="Edit a file by replacing a specific string with new content. The old_string must match exactly (including whitespace and indentation). Use read_file first to see the exact content to replace.",
+            params=(
+                ToolParam("file_path", "string", "The path to the file to edit", required=True),
+                ToolParam("old_string", "string", "The exact string to find and replace. Must be unique within the file unless replace_all is true.", required=True),
+                ToolParam("new_string", "string", "The string to replace old_string with. Can be empty to delete the old_string.", required=True),
+                ToolParam("replace_all", "boolean", "If true, replace all occurrences. If false (default), fail if old_string is not unique."),
+            ),
+        ),
+        ToolSchema(
+            name="list_directory",
+            description="List the contents of a directory. Returns file and directory names with type indicators.",
+            params=(
+                ToolParam("path", "string", "The directory path to list. Use '.' for current directory.", required=True),
+                ToolParam("recursive", "boolean", "If true, list contents recursively up to 3 levels deep. Default is false."),
+                ToolParam("pattern", "string", "Optional glob pattern to filter results (e.g., '*.py')"),
+            ),
+        ),
+        ToolSchema(
+            name="glob_files",
+            description="Find files matching a glob pattern. Returns a list of matching file paths sorted by modification time.",
+            params=(
+                ToolParam("pattern", "string", "Glob pattern to match files (e.g., '**/*.py' for all Python files, 'src/**/*.tsx' for TSX files in src)", required=True),
+                ToolParam("path", "string", "Optional base directory to search from. Defaults to current directory."),
+            ),
+        ),
+        ToolSchema(
+            name="grep_search",
+            description="Search for a text pattern within files using regex. Returns matching lines with file paths and line numbers.",
+            params=(
+                ToolParam("pattern", "string", "Regular expression pattern to search for", required=True),
+                ToolParam("path", "string", "File or directory to search in. Defaults to current directory."),
+                ToolParam("file_pattern", "string", "Glob pattern to filter which files to search (e.g., '*.py')"),
+                ToolParam("case_insensitive", "boolean", "If true, perform case-insensitive matching. Default is false."),
+                ToolParam("context_lines", "integer", "Number of lines to show before and after each match. Default is 0."),
+            ),
+        ),
+        ToolSchema(
+            name="run_command",
+            description="Execute a shell command and return its output. Use for running tests, builds, git commands, and other CLI operations.",
+            params=(
+                ToolParam("command", "string", "The shell command to execute", required=True),
+                ToolParam("working_directory", "string", "Directory to run the command in. Defaults to current directory."),
+                ToolParam("timeout", "integer", "Timeout in seconds. Default is 120 seconds."),
+            ),
+        ),
+    )
+
+
+# The tables below are built on first use (see __getattr__), so importing the
+# package, e.g. for the CLI's --help, doesn't construct every schema.
+
+# The tools, in the order they are offered to the model
+TOOLS_TYPED: tuple[ToolSchema, ...]
+# The API form of TOOLS_TYPED. A tuple so the set of tools can't be changed by
+# accident; the schemas inside are shared, so use get_tools_array_mutable()
+# for a copy that can be edited.
+TOOLS: tuple[dict[str, Any], ...]
+# TOOLS as a JSON array, for request bodies
+_TOOLS_JSON: bytes
+# Tool names, for dispatch checks
+_TOOL_NAMES: tuple[str, ...]
+
+_LAZY_NAMES = frozenset({"TOOLS_TYPED", "TOOLS", "_TOOLS_JSON", "_TOOL_NAMES"})
+_build_lock = threading.Lock()
+_built = False
+
+
+def _build_tools() -> None:
+    """Build the tool tables into the module namespace, once."""
+    global TOOLS_TYPED, TOOLS, _TOOLS_JSON, _TOOL_NAMES, _built
+    if _built:
+        return
+    with _build_lock:
+        # Built once only, so callers can compare against TOOLS by identity
+        if _built:
+            return
+        TOOLS_TYPED = _typed_tools()
+        TOOLS = tuple(tool.as_api_dict() for tool in TOOLS_TYPED)
+        _TOOLS_JSON = orjson.dumps(TOOLS)
+        _TOOL_NAMES = tuple(tool.name for tool in TOOLS_TYPED)
+        _built = True
+
+
+def __getattr__(name: str) -> Any:
+    # Only called for names not yet in the module namespace
+    if name in _LAZY_NAMES:
+        _build_tools()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_tools_array() -> tuple[dict[str, Any], ...]:
+    """Return the tools array for use in API calls (shared; don't modify it)."""
+    _build_tools()
+    return TOOLS
+
+
+def get_tools_array_json() -> bytes:
+    """
+    Return the tools array serialized as JSON.
+
+    To embed it in a larger body without re-serializing, wrap it in
+    orjson.Fragment.
+    """
+    _build_tools()
+    return _TOOLS_JSON
+
+
+def get_tools_array_mutable() -> list[dict[str, Any]]:
+    """Return a deep copy of the tools array that callers may modify."""
+    _build_tools()
+    return copy.deepcopy(list(TOOLS))
 
 
-def get_tool_names() -> list[str]:
-    """Return list of available tool names."""
-    return [tool["function"]["name"] for tool in TOOLS]
+def get_tool_names() -> tuple[str, ...]:
+    """Return the names of the available tools."""
+    _build_tools()
+    return _TOOL_NAMES
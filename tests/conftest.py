@@ -0,0 +1,28 @@
+"""Shared test fixtures."""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# RAM-backed on Linux, so real_fs tests don't wait on disk write-back
+RAM_TEMP_DIR = "/dev/shm" if os.access("/dev/shm", os.W_OK | os.X_OK) else None
+
+
+@pytest.fixture
+def temp_dir(request):
+    """
+    Create a working directory for testing.
+
+    It lives on pyfakefs's in-memory filesystem unless the test is marked
+    real_fs, which tests that run subprocesses or mmap files need; those get
+    a real directory, under /dev/shm where available.
+    """
+    if request.node.get_closest_marker("real_fs"):
+        with tempfile.TemporaryDirectory(dir=RAM_TEMP_DIR) as tmpdir:
+            yield Path(tmpdir)
+        return
+
+    fs = request.getfixturevalue("fs")
+    yield Path(fs.create_dir("/tmp/work").path)
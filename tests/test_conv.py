@@ -0,0 +1,49 @@
+"""Tests for the Anthropic/OpenAI message converters."""
+
+from ollama_tools._conv import anthropic_to_openai, openai_to_anthropic
+
+
+class TestAnthropicToOpenAI:
+    def test_system_prompt_and_text_blocks(self):
+        body = {
+            "system": "Be brief.",
+            "messages": [
+                {"role": "user", "content": "plain"},
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": "first"},
+                        {"type": "image", "source": {}},
+                        "second",
+                    ],
+                },
+            ],
+        }
+
+        assert anthropic_to_openai(body) == [
+            {"role": "system", "content": "Be brief."},
+            {"role": "user", "content": "plain"},
+            {"role": "user", "content": "first\nsecond"},
+        ]
+
+    def test_defaults(self):
+        assert anthropic_to_openai({"messages": [{}]}) == [{"role": "user", "content": ""}]
+
+
+class TestOpenAIToAnthropic:
+    def test_converts_message(self):
+        result = {
+            "id": "chatcmpl-1",
+            "choices": [{"message": {"role": "assistant", "content": "hello"}}],
+            "usage": {"prompt_tokens": 3},
+        }
+
+        assert openai_to_anthropic(result, "m") == {
+            "id": "chatcmpl-1",
+            "type": "message",
+            "role": "assistant",
+            "content": [{"type": "text", "text": "hello"}],
+            "model": "m",
+            "stop_reason": "end_turn",
+            "usage": {"prompt_tokens": 3},
+        }
@@ -1,31 +1,32 @@
 """Tests for the ToolExecutor."""
 
 import os
-import tempfile
-from pathlib import Path
+import shutil
+import subprocess
 
 import pytest
 
-from ollama_tools.executor import ToolExecutor
+from ollama_tools.executor import _RG_COMPATIBLE, ToolExecutor, _split_simple_command
 
 
-@pytest.fixture
-def temp_dir():
-    """Create a temporary directory for testing."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        yield Path(tmpdir)
-
-
-@pytest.fixture
-def executor(temp_dir):
-    """Create a ToolExecutor with temp directory."""
+@pytest.fixture(scope="session")
+def _base_executor():
+    """Create one ToolExecutor for the whole session."""
     return ToolExecutor(
-        working_directory=str(temp_dir),
         allow_commands=True,
         command_allowlist=["echo", "ls", "cat"]
     )
 
 
+@pytest.fixture
+def executor(_base_executor, temp_dir):
+    """Point the shared ToolExecutor at the temp directory, with empty caches."""
+    _base_executor.working_directory = temp_dir.resolve()
+    _base_executor.allowed_directories = [_base_executor.working_directory]
+    _base_executor.clear_cache()
+    return _base_executor
+
+
 class TestReadFile:
     def test_read_existing_file(self, executor, temp_dir):
         # Create test file
@@ -56,6 +57,49 @@ class TestReadFile:
         assert "line 4" in result
         assert "line 5" not in result
 
+    def test_read_accepts_path_arguments(self, executor, temp_dir):
+        (temp_dir / "test.txt").write_text("from a Path\n")
+
+        first = executor.execute("read_file", {"file_path": temp_dir / "test.txt"})
+        second = executor.execute("read_file", {"file_path": temp_dir / "test.txt"})
+
+        assert "from a Path" in first
+        assert second == first
+
+    def test_read_sees_external_changes(self, executor, temp_dir):
+        test_file = temp_dir / "test.txt"
+        test_file.write_text("first version\n")
+        assert "first version" in executor.execute("read_file", {"file_path": "test.txt"})
+
+        test_file.write_text("second version, longer\n")
+        result = executor.execute("read_file", {"file_path": "test.txt"})
+
+        assert "second version" in result
+
+    def test_read_sees_tool_edits(self, executor, temp_dir):
+        test_file = temp_dir / "test.txt"
+        test_file.write_text("Hello, World!")
+        executor.execute("read_file", {"file_path": "test.txt"})
+
+        executor.execute("edit_file", {
+            "file_path": "test.txt",
+            "old_string": "World",
+            "new_string": "Earth"
+        })
+        result = executor.execute("read_file", {"file_path": "test.txt"})
+
+        assert "Hello, Earth!" in result
+
+    def test_read_reports_more_lines(self, executor, temp_dir):
+        test_file = temp_dir / "test.txt"
+        test_file.write_text("\n".join(f"line {i}" for i in range(1, 11)))
+
+        partial = executor.execute("read_file", {"file_path": "test.txt", "limit": 5})
+        full = executor.execute("read_file", {"file_path": "test.txt", "limit": 10})
+
+        assert "more lines follow" in partial
+        assert "more lines follow" not in full
+
 
 class TestWriteFile:
     def test_write_new_file(self, executor, temp_dir):
@@ -67,6 +111,42 @@ class TestWriteFile:
         assert "success" in result.lower()
         assert (temp_dir / "new_file.txt").read_text() == "Hello, World!"
 
+    def test_write_reports_encoded_bytes(self, executor, temp_dir):
+        result = executor.execute("write_file", {
+            "file_path": "unicode.txt",
+            "content": "héllo"
+        })
+
+        assert "6 bytes" in result
+        assert (temp_dir / "unicode.txt").read_text(encoding="utf-8") == "héllo"
+
+    def test_write_accepts_bytes(self, executor, temp_dir):
+        result = executor.execute("write_file", {
+            "file_path": "raw.bin",
+            "content": b"\x00\x01data"
+        })
+
+        assert "6 bytes" in result
+        assert (temp_dir / "raw.bin").read_bytes() == b"\x00\x01data"
+
+    def test_write_recreates_removed_directory(self, executor, temp_dir):
+        executor.execute("write_file", {"file_path": "sub/a.txt", "content": "a"})
+        (temp_dir / "sub" / "a.txt").unlink()
+        (temp_dir / "sub").rmdir()
+
+        result = executor.execute("write_file", {"file_path": "sub/b.txt", "content": "b"})
+
+        assert result.startswith("Successfully")
+        assert (temp_dir / "sub" / "b.txt").read_text() == "b"
+
+    def test_clear_cache_forgets_known_directories(self, executor):
+        executor.execute("write_file", {"file_path": "sub/a.txt", "content": "a"})
+        assert executor._known_dirs
+
+        executor.clear_cache()
+
+        assert not executor._known_dirs
+
     def test_write_creates_directories(self, executor, temp_dir):
         result = executor.execute("write_file", {
             "file_path": "subdir/nested/file.txt",
@@ -103,6 +183,20 @@ class TestEditFile:
 
         assert "2 times" in result.lower() or "not unique" in result.lower()
 
+    def test_edit_reports_missing_string_and_file(self, executor, temp_dir):
+        (temp_dir / "test.txt").write_text("foo bar")
+
+        missing_string = executor.execute("edit_file", {
+            "file_path": "test.txt", "old_string": "baz", "new_string": "x"
+        })
+        missing_file = executor.execute("edit_file", {
+            "file_path": "nope.txt", "old_string": "foo", "new_string": "x"
+        })
+
+        assert missing_string.startswith("Error: old_string not found in file")
+        assert missing_file == "Error: File does not exist: nope.txt"
+        assert (temp_dir / "test.txt").read_text() == "foo bar"
+
     def test_edit_replace_all(self, executor, temp_dir):
         test_file = temp_dir / "test.txt"
         test_file.write_text("foo bar foo")
@@ -117,6 +211,22 @@ class TestEditFile:
         assert "success" in result.lower()
         assert test_file.read_text() == "baz bar baz"
 
+    def test_edit_preserves_mode_and_leaves_no_temp_files(self, executor, temp_dir):
+        test_file = temp_dir / "script.sh"
+        test_file.write_text("echo old\n")
+        test_file.chmod(0o755)
+
+        result = executor.execute("edit_file", {
+            "file_path": "script.sh",
+            "old_string": "old",
+            "new_string": "new"
+        })
+
+        assert "success" in result.lower()
+        assert test_file.read_text() == "echo new\n"
+        assert test_file.stat().st_mode & 0o777 == 0o755
+        assert [p.name for p in temp_dir.iterdir()] == ["script.sh"]
+
 
 class TestListDirectory:
     def test_list_directory(self, executor, temp_dir):
@@ -142,6 +252,38 @@ class TestListDirectory:
         assert "file2.py" in result
         assert "file1.txt" not in result
 
+    def test_list_recursive_limits_depth(self, executor, temp_dir):
+        deep = temp_dir / "a" / "b" / "c" / "d" / "e"
+        deep.mkdir(parents=True)
+        (temp_dir / "a" / "top.txt").touch()
+        (deep / "hidden.txt").touch()
+
+        result = executor.execute("list_directory", {"path": ".", "recursive": True})
+
+        assert "[DIR]  a/" in result
+        assert "[FILE] a/top.txt" in result
+        assert "[DIR]  a/b/c/d/" in result
+        assert "a/b/c/d/e/" not in result
+        assert "hidden.txt" not in result
+
+    def test_list_reports_missing_and_non_directories(self, executor, temp_dir):
+        (temp_dir / "file.txt").touch()
+
+        missing = executor.execute("list_directory", {"path": "missing"})
+        not_dir = executor.execute("list_directory", {"path": "file.txt"})
+
+        assert missing == "Error: Directory does not exist: missing"
+        assert not_dir == "Error: Path is not a directory: file.txt"
+
+    @pytest.mark.real_fs
+    def test_list_path_under_a_file(self, executor, temp_dir):
+        # The real os.stat raises NotADirectoryError here, pyfakefs does not
+        (temp_dir / "file.txt").touch()
+
+        result = executor.execute("list_directory", {"path": "file.txt/sub"})
+
+        assert result == "Error: Directory does not exist: file.txt/sub"
+
 
 class TestGlobFiles:
     def test_glob_pattern(self, executor, temp_dir):
@@ -156,7 +298,49 @@ class TestGlobFiles:
         assert "utils.py" in result
         assert "readme.md" not in result
 
+    def test_glob_single_level_pattern(self, executor, temp_dir):
+        (temp_dir / "src").mkdir()
+        (temp_dir / "src/main.py").touch()
+        (temp_dir / "setup.py").touch()
+
+        assert executor.execute("glob_files", {"pattern": "*.py"}) == "setup.py"
+        assert executor.execute("glob_files", {"pattern": "src/*.py"}) == "src/main.py"
+
+    def test_glob_matches_pathlib(self, executor, temp_dir):
+        for rel in ["src/a/x.py", "src/b/c/x.py", "lib/a/x.py", "srcx/a/x.py", "x.py"]:
+            (temp_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+            (temp_dir / rel).touch()
+
+        for pattern in ["src/*/x.py", "s*/**/x.py", "src/**/c/*.py", "*/a/*.py"]:
+            result = executor.execute("glob_files", {"pattern": pattern})
+            expected = {p.relative_to(temp_dir).as_posix() for p in temp_dir.glob(pattern)}
+            assert set(result.splitlines()) == expected, pattern
+
+    def test_glob_follows_symlinked_directories_like_pathlib(self, executor, temp_dir):
+        (temp_dir / "real/sub").mkdir(parents=True)
+        (temp_dir / "real/a.py").touch()
+        (temp_dir / "real/sub/b.py").touch()
+        os.symlink(temp_dir / "real", temp_dir / "linkdir")
+
+        assert executor.execute("glob_files", {"pattern": "linkdir/*.py"}) == "linkdir/a.py"
+        for pattern in ["linkdir/*.py", "l*/*.py", "linkdir/**/*.py", "**/*.py"]:
+            result = executor.execute("glob_files", {"pattern": pattern})
+            expected = {p.relative_to(temp_dir).as_posix() for p in temp_dir.glob(pattern)}
+            assert set(result.splitlines()) == expected, pattern
+
+    def test_glob_sorted_by_mtime(self, executor, temp_dir):
+        for i, name in enumerate(["old.py", "new.py", "mid.py"]):
+            path = temp_dir / name
+            path.touch()
+            os.utime(path, (1000 + i * 10, {"old.py": 1000, "mid.py": 2000, "new.py": 3000}[name]))
+
+        result = executor.execute("glob_files", {"pattern": "*.py"})
 
+        assert result.splitlines() == ["new.py", "mid.py", "old.py"]
+
+
+# Searches mmap files and may run ripgrep
+@pytest.mark.real_fs
 class TestGrepSearch:
     def test_grep_finds_pattern(self, executor, temp_dir):
         test_file = temp_dir / "test.py"
@@ -178,7 +362,169 @@ class TestGrepSearch:
 
         assert "Hello" in result
 
+    def test_grep_reports_line_numbers(self, executor, temp_dir):
+        test_file = temp_dir / "test.py"
+        test_file.write_text("import os\n\ndef hello():\n    return 'hello'\n")
+
+        result = executor.execute("grep_search", {"pattern": "hello"})
+
+        assert "test.py:3: def hello():" in result
+        assert "test.py:4:     return 'hello'" in result
+        assert "Found 2 matches in 1 files" in result
 
+    def test_grep_context_lines(self, executor, temp_dir):
+        test_file = temp_dir / "test.txt"
+        test_file.write_text("one\ntwo\nthree\nfour\nfive\n")
+
+        result = executor.execute("grep_search", {"pattern": "^three$", "context_lines": 1})
+
+        assert "  2: two" in result
+        assert "> 3: three" in result
+        assert "  4: four" in result
+        assert "five" not in result
+
+    def test_grep_caps_matches_across_files(self, executor, temp_dir, monkeypatch):
+        from ollama_tools import executor as executor_module
+
+        # ripgrep searches every file; the Python scan stops once it has enough
+        monkeypatch.setattr(executor_module, "RG_PATH", None)
+        for i in range(30):
+            (temp_dir / f"f{i:02}.txt").write_text("match\n" * 10)
+
+        result = executor.execute("grep_search", {"pattern": "match"})
+
+        assert result.count(": match") == 100
+        assert "Found 100 matches in 10 files" in result
+
+    def test_grep_literal_hyperscan_matches_re(self, executor, temp_dir, monkeypatch):
+        pytest.importorskip("hyperscan")
+        from ollama_tools import executor as executor_module
+
+        (temp_dir / "a.txt").write_text("Needle one\nno\nneedle twice needle\nlast NEEDLE")
+        (temp_dir / "b.txt").write_text("haystack\n")
+        args = {"pattern": "needle", "case_insensitive": True, "context_lines": 1}
+
+        with_hyperscan = executor.execute("grep_search", args)
+        executor.clear_cache()
+        monkeypatch.setattr(executor_module, "hyperscan", None)
+        with_re = executor.execute("grep_search", args)
+
+        assert with_hyperscan == with_re
+        assert "Found 3 matches" in with_re
+
+    def test_grep_regex_hyperscan_prefilter_matches_re(self, executor, temp_dir, monkeypatch):
+        pytest.importorskip("hyperscan")
+        from ollama_tools import executor as executor_module
+
+        (temp_dir / "a.py").write_text("def foo():\n    return foo_bar\nfoofoo\n")
+        (temp_dir / "b.py").write_text("nothing here\n")
+        # Backreferences and lookbehinds are prefiltered, not matched, by Hyperscan
+        for pattern in [r"^def \w+\(", r"(foo)\1", r"(?<=return )foo", r"fo{,1}o_"]:
+            args = {"pattern": pattern}
+            with_hyperscan = executor.execute("grep_search", args)
+            executor.clear_cache()
+            with monkeypatch.context() as m:
+                m.setattr(executor_module, "hyperscan", None)
+                with_re = executor.execute("grep_search", args)
+            executor.clear_cache()
+
+            assert with_hyperscan == with_re
+            assert "a.py" in with_re
+
+    @pytest.mark.parametrize("with_hyperscan", [True, False])
+    def test_grep_matches_decoded_lines(self, executor, temp_dir, monkeypatch, with_hyperscan):
+        from ollama_tools import executor as executor_module
+
+        if with_hyperscan:
+            pytest.importorskip("hyperscan")
+        else:
+            monkeypatch.setattr(executor_module, "hyperscan", None)
+        monkeypatch.setattr(executor_module, "RG_PATH", None)
+        (temp_dir / "text.txt").write_text(
+            "cafà\ncafé au lait\nNAÏVE\nfoo\nbar\nfoo bar\r\nend\n", encoding="utf-8", newline=""
+        )
+        (temp_dir / "ascii.txt").write_text("caf\nfoo\nbar\n")
+
+        cases = [
+            ("caf[é]", False, ["text.txt:2: café au lait"]),
+            ("caf.$", False, ["text.txt:1: cafà"]),
+            (r"^\w+ au", False, ["text.txt:2: café au lait"]),
+            ("naïve", True, ["text.txt:3: NAÏVE"]),
+            (r"foo\s+bar", False, ["text.txt:6: foo bar"]),
+            ("bar$", False, ["ascii.txt:3: bar", "text.txt:5: bar", "text.txt:6: foo bar"]),
+            # Each line is its own string, newline included
+            (r"\Abar", False, ["ascii.txt:3: bar", "text.txt:5: bar"]),
+            (r"t\n\Z", False, ["text.txt:2: café au lait"]),
+            (r"(?<=\n)bar", False, []),
+        ]
+        for pattern, case_insensitive, expected in cases:
+            result = executor.execute("grep_search", {
+                "pattern": pattern, "case_insensitive": case_insensitive
+            })
+            executor.clear_cache()
+
+            found = [] if result.startswith("No matches") else result.split("\n\n")[0].splitlines()
+            assert sorted(found) == expected, pattern
+
+    def test_grep_literal_caps_matches_in_one_file(self, executor, temp_dir):
+        (temp_dir / "many.txt").write_text("needle\n" * 150)
+
+        result = executor.execute("grep_search", {"pattern": "needle"})
+
+        assert "[Found 100 matches in 1 files" in result
+
+    @pytest.mark.skipif(shutil.which("rg") is None, reason="ripgrep not installed")
+    def test_grep_ripgrep_matches_python(self, executor, temp_dir, monkeypatch):
+        from ollama_tools import executor as executor_module
+
+        (temp_dir / "a.py").write_text("import os\n\ndef hello():\n    return 'Hello'\n")
+        (temp_dir / "sub").mkdir()
+        (temp_dir / "sub" / "b.txt").write_text("hello\nworld\nhello again\n")
+        (temp_dir / ".hidden").write_text("HELLO\n")
+        for args in [
+            {"pattern": "hello"},
+            {"pattern": "^def \\w+", "file_pattern": "*.py"},
+            {"pattern": "HELLO", "case_insensitive": True, "context_lines": 1},
+            {"pattern": "(?<=return )'", "path": "a.py"},  # lookbehind: falls back to Python
+            {"pattern": r"\<hello"},  # a word boundary to ripgrep: falls back to Python
+        ]:
+            with_rg = executor.execute("grep_search", args)
+            executor.clear_cache()
+            with monkeypatch.context() as m:
+                m.setattr(executor_module, "RG_PATH", None)
+                with_python = executor.execute("grep_search", args)
+            executor.clear_cache()
+
+            assert with_rg == with_python
+
+    @pytest.mark.parametrize("pattern, compatible", [
+        ("hello", True),
+        (r"^def \w+\(", True),
+        (r"[a-z_][\w.-]*", True),
+        (r"(?:foo|bar){2,3}?", True),
+        (r"(?<=a)b", False),
+        (r"\Afoo", False),
+        (r"(\w)\1", False),
+        (r"[[:alpha:]]", False),
+        (r"[a-z&&[^aeiou]]", False),
+        (r"[\w--\d]", False),
+        (r"x{,3}", False),
+        (r"\<word\>", False),
+    ])
+    def test_ripgrep_compatible_patterns(self, pattern, compatible):
+        assert bool(_RG_COMPATIBLE.fullmatch(pattern)) is compatible
+
+    def test_grep_skips_binary_files(self, executor, temp_dir):
+        (temp_dir / "data.bin").write_bytes(b"hello\x00world")
+        (temp_dir / "text.txt").write_text("hello\n")
+
+        result = executor.execute("grep_search", {"pattern": "hello"})
+
+        assert "text.txt" in result
+        assert "data.bin" not in result
+
+
+@pytest.mark.real_fs
 class TestRunCommand:
     def test_run_allowed_command(self, executor):
         result = executor.execute("run_command", {"command": "echo 'hello'"})
@@ -188,6 +534,79 @@ class TestRunCommand:
         result = executor.execute("run_command", {"command": "rm -rf /"})
         assert "not in allowlist" in result.lower()
 
+    def test_simple_commands_skip_the_shell(self):
+        assert _split_simple_command("ls -l 'a  b' c") == ["ls", "-l", "a  b", "c"]
+        assert _split_simple_command("echo hi") is None  # a builtin
+        assert _split_simple_command("echo hi | cat") is None
+        assert _split_simple_command("ls *.py") is None
+        assert _split_simple_command("FOO=1 env") is None
+
+    async def test_shell_syntax_and_builtins_still_work(self, temp_dir):
+        executor = ToolExecutor(working_directory=str(temp_dir))
+
+        piped = {"command": "echo 'a  b' | cat"}
+        builtin = {"command": "exit 3"}
+
+        assert executor.execute("run_command", piped) == "Success\n\nSTDOUT:\na  b\n"
+        assert await executor.execute_async("run_command", piped) == "Success\n\nSTDOUT:\na  b\n"
+        assert executor.execute("run_command", builtin).startswith("Failed (exit code 3)")
+        assert (await executor.execute_async("run_command", builtin)).startswith("Failed (exit code 3)")
+
+    @pytest.mark.parametrize("command", [
+        r"echo 'a\nb'",
+        "echo -e x",
+        "printf '%s-' a b",
+        "pwd",
+        "type ls",
+        "cat notes.txt",
+        "ls",
+        "./script.sh one",
+        "./noshebang.sh",
+        "no-such-command",
+    ])
+    async def test_output_matches_the_shell(self, temp_dir, command):
+        (temp_dir / "notes.txt").write_text("notes\n")
+        (temp_dir / "script.sh").write_text("#!/bin/sh\necho \"script $1\"\n")
+        (temp_dir / "noshebang.sh").write_text("echo no shebang\n")
+        os.chmod(temp_dir / "script.sh", 0o755)
+        os.chmod(temp_dir / "noshebang.sh", 0o755)
+        executor = ToolExecutor(working_directory=str(temp_dir))
+
+        shell = subprocess.run(command, shell=True, cwd=temp_dir, capture_output=True, text=True)
+        expected = executor._format_command_result(shell.stdout, shell.stderr, shell.returncode)
+
+        assert executor.execute("run_command", {"command": command}) == expected
+        assert await executor.execute_async("run_command", {"command": command}) == expected
+
+    def test_allowlist_matches_prefixes(self, temp_dir):
+        executor = ToolExecutor(
+            working_directory=str(temp_dir),
+            command_allowlist=["python", "npm", "git status", "./"]
+        )
+
+        assert executor._check_command("  python -V") is None
+        assert executor._check_command("python3 script.py") is None
+        assert executor._check_command("npm-check") is None
+        assert executor._check_command("git status --short") is None
+        assert executor._check_command("./run.sh") is None
+        assert "not in allowlist" in executor._check_command("git diff")
+        assert "not in allowlist" in executor._check_command("echo python")
+
+    async def test_run_command_async(self, executor):
+        result = await executor.execute_async("run_command", {"command": "echo 'hello'"})
+        assert result.startswith("Success")
+        assert "hello" in result
+
+    async def test_run_command_async_timeout(self, temp_dir):
+        executor = ToolExecutor(working_directory=str(temp_dir))
+        result = await executor.execute_async("run_command", {"command": "sleep 5", "timeout": 0.1})
+        assert "timed out" in result.lower()
+
+    async def test_file_tools_async(self, executor, temp_dir):
+        (temp_dir / "test.txt").write_text("async content\n")
+        result = await executor.execute_async("read_file", {"file_path": "test.txt"})
+        assert "async content" in result
+
 
 class TestSecurityRestrictions:
     def test_cannot_access_outside_working_dir(self, temp_dir):
@@ -207,3 +626,74 @@ class TestSecurityRestrictions:
 
         result = executor.execute("run_command", {"command": "echo test"})
         assert "disabled" in result.lower()
+
+    @pytest.mark.real_fs
+    def test_symlink_created_by_command_is_rechecked(self, temp_dir):
+        (temp_dir / "link").mkdir()
+        executor = ToolExecutor(working_directory=str(temp_dir))
+
+        executor.execute("read_file", {"file_path": "link/passwd"})
+        executor.execute("run_command", {"command": "rmdir link && ln -s /etc link"})
+        result = executor.execute("read_file", {"file_path": "link/passwd"})
+
+        assert "denied" in result.lower() or "outside" in result.lower()
+
+    @pytest.mark.real_fs
+    def test_symlink_retargeted_outside_tools_is_rechecked(self, temp_dir):
+        (temp_dir / "inside").mkdir()
+        (temp_dir / "inside" / "passwd").write_text("inside\n")
+        os.symlink(temp_dir / "inside", temp_dir / "link")
+        executor = ToolExecutor(working_directory=str(temp_dir))
+
+        assert "inside" in executor.execute("read_file", {"file_path": "link/passwd"})
+        os.remove(temp_dir / "link")
+        os.symlink("/etc", temp_dir / "link")
+        result = executor.execute("read_file", {"file_path": "link/passwd"})
+
+        assert "denied" in result.lower() or "outside" in result.lower()
+
+
+class TestExecuteToolCall:
+    def test_unknown_tool(self, executor):
+        assert executor.execute("delete_everything", {}) == "Error: Unknown tool 'delete_everything'"
+        # Only tools with a schema are dispatched, not arbitrary _tool_ attributes
+        assert executor.execute("run_command_async", {"command": "echo hi"}).startswith("Error: Unknown tool")
+
+    def test_executes_api_tool_call(self, executor, temp_dir):
+        (temp_dir / "test.txt").write_text("from a tool call\n")
+
+        message = executor.execute_tool_call({
+            "id": "call_1",
+            "function": {"name": "read_file", "arguments": '{"file_path": "test.txt"}'}
+        })
+
+        assert message["role"] == "tool"
+        assert message["tool_call_id"] == "call_1"
+        assert "from a tool call" in message["content"]
+
+    def test_invalid_arguments_json(self, executor):
+        message = executor.execute_tool_call({
+            "id": "call_1",
+            "function": {"name": "read_file", "arguments": "{not json"}
+        })
+
+        assert "Error executing read_file" in message["content"]
+
+    async def test_execute_tool_calls_keeps_order(self, executor, temp_dir):
+        (temp_dir / "a.txt").write_text("first")
+        tool_calls = [
+            {"id": "call_1", "function": {"name": "read_file", "arguments": '{"file_path": "a.txt"}'}},
+            {"id": "call_2", "function": {
+                "name": "write_file",
+                "arguments": '{"file_path": "a.txt", "content": "second"}',
+            }},
+            {"id": "call_3", "function": {"name": "read_file", "arguments": '{"file_path": "a.txt"}'}},
+            {"id": "call_4", "function": {"name": "list_directory", "arguments": '{"path": "."}'}},
+        ]
+
+        results = await executor.execute_tool_calls(tool_calls, concurrency=2)
+
+        assert [r["tool_call_id"] for r in results] == ["call_1", "call_2", "call_3", "call_4"]
+        assert "first" in results[0]["content"]
+        assert "second" in results[2]["content"]
+        assert "a.txt" in results[3]["content"]
@@ -0,0 +1,458 @@
+"""Tests for the OllamaToolProxy."""
+
+import asyncio
+import json
+import os
+import stat
+
+import httpx
+import pytest
+
+from ollama_tools.cli import _write_worker_config
+from ollama_tools.proxy import (
+    CONFIG_FILE_ENV_VAR,
+    OllamaToolProxy,
+    ProxyConfig,
+    _approx_tokens,
+    create_app,
+)
+from ollama_tools.schemas import TOOLS
+
+
+def sse(*chunks):
+    """Encode chunks as an OpenAI-style SSE body."""
+    lines = [f"data: {json.dumps(chunk)}\n\n" for chunk in chunks]
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+
+def make_proxy(temp_dir, handler):
+    """Create a proxy whose Ollama requests are answered by handler."""
+    proxy = OllamaToolProxy(ProxyConfig(working_directory=str(temp_dir)))
+    proxy.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return proxy
+
+
+class TestProxyConfig:
+    def test_workers_read_the_config_from_a_private_file(self, temp_dir, monkeypatch):
+        config = ProxyConfig(ollama_auth_token="secret", max_tool_iterations=3)
+        monkeypatch.setattr("tempfile.tempdir", str(temp_dir))
+
+        path = _write_worker_config(config)
+        monkeypatch.setenv(CONFIG_FILE_ENV_VAR, path)
+
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert ProxyConfig.from_env() == config
+
+
+class TestChatCompletion:
+    async def test_executes_parallel_tool_calls_in_order(self, temp_dir):
+        (temp_dir / "a.txt").write_text("alpha\n")
+        (temp_dir / "b.txt").write_text("beta\n")
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            if len(requests) == 1:
+                message = {
+                    "role": "assistant",
+                    "content": "",
+                    "tool_calls": [
+                        {
+                            "id": f"call_{name}",
+                            "type": "function",
+                            "function": {
+                                "name": "read_file",
+                                "arguments": json.dumps({"file_path": f"{name}.txt"}),
+                            },
+                        }
+                        for name in ("a", "b")
+                    ],
+                }
+            else:
+                message = {"role": "assistant", "content": "done"}
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        result = await proxy.chat_completion([{"role": "user", "content": "read both"}])
+
+        assert result["choices"][0]["message"]["content"] == "done"
+        tool_results = requests[1]["messages"][-2:]
+        assert [m["tool_call_id"] for m in tool_results] == ["call_a", "call_b"]
+        assert "alpha" in tool_results[0]["content"]
+        assert "beta" in tool_results[1]["content"]
+
+    async def test_in_place_appends_to_caller_messages(self, temp_dir):
+        def handler(request):
+            first = len(json.loads(request.content)["messages"]) == 1
+            tool_calls = (
+                [
+                    {
+                        "id": "call_1",
+                        "type": "function",
+                        "function": {"name": "list_directory", "arguments": '{"path": "."}'},
+                    }
+                ]
+                if first
+                else []
+            )
+            message = {"role": "assistant", "content": "", "tool_calls": tool_calls}
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        copied = [{"role": "user", "content": "list"}]
+        shared = [{"role": "user", "content": "list"}]
+        await proxy.chat_completion(copied)
+        await proxy.chat_completion(shared, in_place=True)
+
+        assert len(copied) == 1
+        assert [m["role"] for m in shared] == ["user", "assistant", "tool"]
+
+    async def test_keep_alive_sent_on_every_iteration(self, temp_dir):
+        requests = []
+
+        def handler(request):
+            requests.append(json.loads(request.content))
+            tool_calls = (
+                []
+                if len(requests) > 1
+                else [
+                    {
+                        "id": "call_1",
+                        "type": "function",
+                        "function": {"name": "list_directory", "arguments": '{"path": "."}'},
+                    }
+                ]
+            )
+            message = {"role": "assistant", "content": "", "tool_calls": tool_calls}
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        await proxy.chat_completion([{"role": "user", "content": "list"}])
+
+        assert [r["keep_alive"] for r in requests] == ["30m", "30m"]
+        # Later requests extend the earlier conversation without rewriting it
+        assert requests[1]["messages"][:1] == requests[0]["messages"]
+
+    async def test_injects_default_tools(self, temp_dir):
+        requests = []
+
+        def handler(request):
+            assert request.headers["content-type"] == "application/json"
+            requests.append(json.loads(request.content))
+            message = {"role": "assistant", "content": "hi"}
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        await proxy.chat_completion([{"role": "user", "content": "hi"}])
+        await proxy.chat_completion([{"role": "user", "content": "hi"}], tools=[])
+
+        assert requests[0]["tools"] == json.loads(json.dumps(TOOLS))
+        assert "tools" not in requests[1]
+
+    async def test_identical_concurrent_requests_share_one_call(self, temp_dir):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            message = {"role": "assistant", "content": "shared"}
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        messages = [{"role": "user", "content": "same question"}]
+        first, second = await asyncio.gather(
+            proxy.chat_completion(list(messages)),
+            proxy.chat_completion(list(messages)),
+        )
+
+        assert len(requests) == 1
+        assert first == second
+        assert first is not second
+        assert proxy._inflight == {}
+
+    async def test_cancelling_the_last_waiter_cancels_the_upstream_call(self, temp_dir):
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def handler(request):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        proxy = make_proxy(temp_dir, handler)
+        messages = [{"role": "user", "content": "abandoned"}]
+        first = asyncio.create_task(proxy.chat_completion(list(messages)))
+        second = asyncio.create_task(proxy.chat_completion(list(messages)))
+        await started.wait()
+
+        first.cancel()
+        await asyncio.sleep(0)
+        assert not cancelled.is_set()
+
+        second.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        for call in (first, second):
+            with pytest.raises(asyncio.CancelledError):
+                await call
+        assert proxy._inflight == {}
+        assert proxy._waiters == {}
+
+    async def test_caches_temperature_zero_responses(self, temp_dir):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            message = {"role": "assistant", "content": f"answer {len(requests)}"}
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        messages = [{"role": "user", "content": "same question"}]
+        first = await proxy.chat_completion(list(messages), temperature=0)
+        second = await proxy.chat_completion(list(messages), temperature=0)
+        await proxy.chat_completion(list(messages), temperature=0.7)
+        await proxy.chat_completion(list(messages), temperature=0.7)
+
+        assert second == first
+        assert len(requests) == 3
+
+    async def test_response_cache_expires(self, temp_dir):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            message = {"role": "assistant", "content": "answer"}
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        proxy.config.response_cache_ttl = 0
+        for _ in range(2):
+            await proxy.chat_completion([{"role": "user", "content": "q"}], temperature=0)
+
+        assert len(requests) == 2
+
+    async def test_tool_loop_deadline(self, temp_dir):
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            await asyncio.sleep(0.05)
+            message = {
+                "role": "assistant",
+                "content": "",
+                "tool_calls": [
+                    {
+                        "id": f"call_{len(requests)}",
+                        "type": "function",
+                        "function": {"name": "list_directory", "arguments": '{"path": "."}'},
+                    }
+                ],
+            }
+            return httpx.Response(200, json={"choices": [{"index": 0, "message": message}]})
+
+        proxy = make_proxy(temp_dir, handler)
+        proxy.config.tool_loop_deadline_seconds = 0.12
+        result = await proxy.chat_completion([{"role": "user", "content": "loop"}])
+
+        assert result["choices"][0]["finish_reason"] == "max_time"
+        assert 1 <= len(requests) < proxy.config.max_tool_iterations
+
+    async def test_error_status(self, temp_dir):
+        proxy = make_proxy(temp_dir, lambda request: httpx.Response(500, text="boom"))
+
+        with pytest.raises(httpx.HTTPStatusError) as excinfo:
+            await proxy.chat_completion([{"role": "user", "content": "hi"}])
+        assert excinfo.value.response.status_code == 500
+        assert proxy._inflight == {}
+
+
+class TestChatCompletionStream:
+    async def test_streams_content_chunks(self, temp_dir):
+        def handler(request):
+            assert json.loads(request.content)["stream"] is True
+            return httpx.Response(
+                200,
+                content=sse(
+                    {"choices": [{"index": 0, "delta": {"content": "Hel"}}]},
+                    {
+                        "choices": [
+                            {"index": 0, "delta": {"content": "lo"}, "finish_reason": "stop"}
+                        ]
+                    },
+                ),
+            )
+
+        proxy = make_proxy(temp_dir, handler)
+        events = [
+            event
+            async for event in proxy.chat_completion_stream([{"role": "user", "content": "hi"}])
+        ]
+
+        assert len(events) == 3
+        assert json.loads(events[0][len(b"data: ") :])["choices"][0]["delta"]["content"] == "Hel"
+        assert events[-1] == b"data: [DONE]\n\n"
+
+    async def test_executes_streamed_tool_calls(self, temp_dir):
+        (temp_dir / "notes.txt").write_text("tool output\n")
+        requests = []
+
+        def handler(request):
+            body = json.loads(request.content)
+            requests.append(body)
+            if len(requests) == 1:
+                return httpx.Response(
+                    200,
+                    content=sse(
+                        {
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "delta": {
+                                        "tool_calls": [
+                                            {
+                                                "index": 0,
+                                                "id": "call_1",
+                                                "type": "function",
+                                                "function": {
+                                                    "name": "read_file",
+                                                    "arguments": '{"file_path": ',
+                                                },
+                                            }
+                                        ]
+                                    },
+                                }
+                            ]
+                        },
+                        {
+                            "choices": [
+                                {
+                                    "index": 0,
+                                    "delta": {
+                                        "tool_calls": [
+                                            {
+                                                "index": 0,
+                                                "function": {"arguments": '"notes.txt"}'},
+                                            }
+                                        ]
+                                    },
+                                }
+                            ]
+                        },
+                        {"choices": [{"index": 0, "delta": {}, "finish_reason": "tool_calls"}]},
+                    ),
+                )
+            return httpx.Response(
+                200,
+                content=sse(
+                    {
+                        "choices": [
+                            {"index": 0, "delta": {"content": "done"}, "finish_reason": "stop"}
+                        ]
+                    },
+                ),
+            )
+
+        proxy = make_proxy(temp_dir, handler)
+        events = [
+            event
+            async for event in proxy.chat_completion_stream([{"role": "user", "content": "read"}])
+        ]
+
+        assert len(requests) == 2
+        assistant, tool_result = requests[1]["messages"][-2:]
+        assert assistant["tool_calls"][0]["function"]["arguments"] == '{"file_path": "notes.txt"}'
+        assert tool_result["tool_call_id"] == "call_1"
+        assert "tool output" in tool_result["content"]
+        assert events == [
+            b'data: {"choices": [{"index": 0, "delta": {"content": "done"}, "finish_reason": "stop"}]}\n\n',
+            b"data: [DONE]\n\n",
+        ]
+
+
+class TestCallOllamaAnthropic:
+    async def test_parses_response_body(self, temp_dir):
+        def handler(request):
+            assert request.url.path == "/v1/messages"
+            assert json.loads(request.content)["stream"] is False
+            return httpx.Response(200, json={"type": "message", "content": []})
+
+        proxy = make_proxy(temp_dir, handler)
+
+        assert await proxy._call_ollama_anthropic({"model": "m", "messages": []}) == {
+            "type": "message",
+            "content": [],
+        }
+
+    async def test_error_status(self, temp_dir):
+        proxy = make_proxy(temp_dir, lambda request: httpx.Response(404, text="model not found"))
+
+        with pytest.raises(httpx.HTTPStatusError) as excinfo:
+            await proxy._call_ollama_anthropic({"model": "m", "messages": []})
+        assert excinfo.value.response.status_code == 404
+        assert excinfo.value.response.text == "model not found"
+
+    async def test_empty_response_body(self, temp_dir):
+        proxy = make_proxy(temp_dir, lambda request: httpx.Response(200))
+
+        with pytest.raises(ValueError, match="Empty response"):
+            await proxy._call_ollama_anthropic({"model": "m", "messages": []})
+
+
+class TestWarmUp:
+    async def test_opens_connections(self, temp_dir):
+        paths = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            return httpx.Response(200, json={"data": []})
+
+        proxy = make_proxy(temp_dir, handler)
+        await proxy.warm_up(connections=3)
+
+        assert paths == ["/v1/models"] * 3
+
+    async def test_ignores_unreachable_ollama(self, temp_dir):
+        def handler(request):
+            raise httpx.ConnectError("connection refused")
+
+        proxy = make_proxy(temp_dir, handler)
+        await proxy.warm_up()
+
+
+class TestEndpoints:
+    @pytest.fixture
+    def client(self, temp_dir):
+        app = create_app(ProxyConfig(working_directory=str(temp_dir)))
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://proxy")
+
+    async def test_count_tokens(self, client):
+        response = await client.post(
+            "/v1/messages/count_tokens", json={"messages": [{"role": "user", "content": "x" * 400}]}
+        )
+
+        assert response.json() == {"input_tokens": 100}
+
+    async def test_invalid_json_body(self, client):
+        for path in ("/v1/chat/completions", "/v1/messages"):
+            response = await client.post(path, content=b"{not json")
+            assert response.status_code == 400
+
+
+class TestApproxTokens:
+    def test_counts_text_content(self):
+        messages = [
+            {"role": "user", "content": "a" * 40},
+            {
+                "role": "assistant",
+                "content": [
+                    {"type": "text", "text": "b" * 20},
+                    {"type": "tool_result", "tool_use_id": "t1", "content": "c" * 20},
+                    {"type": "image", "source": {}},
+                ],
+            },
+            {"role": "assistant", "content": None},
+        ]
+
+        assert _approx_tokens(messages) == 20
@@ -0,0 +1,70 @@
+"""Tests for the tool schema definitions."""
+
+import dataclasses
+import subprocess
+import sys
+
+import orjson
+import pytest
+
+from ollama_tools.schemas import (
+    TOOLS,
+    TOOLS_TYPED,
+    get_tool_names,
+    get_tools_array,
+    get_tools_array_json,
+    get_tools_array_mutable,
+)
+
+
+class TestToolsArray:
+    def test_shared_array(self):
+        assert get_tools_array() is TOOLS
+
+    def test_mutable_copy_is_independent(self):
+        tools = get_tools_array_mutable()
+        tools[0]["function"]["name"] = "renamed"
+        tools.pop()
+
+        assert TOOLS[0]["function"]["name"] == "read_file"
+        assert len(tools) == len(TOOLS) - 1
+
+    def test_built_from_typed_schemas(self):
+        assert TOOLS == tuple(tool.as_api_dict() for tool in TOOLS_TYPED)
+        assert TOOLS[2]["function"]["parameters"]["required"] == [
+            "file_path",
+            "old_string",
+            "new_string",
+        ]
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            TOOLS_TYPED[0].name = "renamed"
+
+    def test_api_dicts_share_strings_and_key_order(self):
+        read_file = TOOLS[0]["function"]
+        offset = read_file["parameters"]["properties"]["offset"]
+
+        assert read_file["description"] is TOOLS_TYPED[0].description
+        assert offset["description"] is TOOLS_TYPED[0].params[1].description
+        assert {tuple(tool) for tool in TOOLS} == {("type", "function")}
+        assert {
+            tuple(param)
+            for tool in TOOLS
+            for param in tool["function"]["parameters"]["properties"].values()
+        } == {("type", "description")}
+
+    def test_json(self):
+        assert get_tools_array_json() is get_tools_array_json()
+        assert orjson.loads(get_tools_array_json()) == list(TOOLS)
+
+    def test_tool_names(self):
+        assert get_tool_names() == tuple(tool["function"]["name"] for tool in TOOLS)
+        assert "run_command" in get_tool_names()
+
+
+class TestLazyBuild:
+    def test_import_does_not_build_tools(self):
+        code = (
+            "import ollama_tools, ollama_tools.schemas as s; assert not s._built; "
+            "assert ollama_tools.TOOLS is s.get_tools_array() and s._built"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)